@@ -0,0 +1,4 @@
+"""
+Modules shared by the Streamlit apps and the exploration scripts. Every app puts the
+repository root on sys.path before importing it.
+"""
@@ -0,0 +1,140 @@
+from speech_common.log import logger
+
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+import time
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+BOUNDS = ("low", "mid", "high")
+
+# Largest (bootstrap sample x row) block of resample counts held in memory at once
+MAX_BLOCK_ELEMENTS = 1 << 25
+
+
+def bootstrap_intervals(
+        values: np.ndarray,
+        confidence_interval: float = 0.95,
+        n_samples: int = 1000,
+        seed: Optional[int] = 0
+) -> np.ndarray:
+    """
+    Bootstrap confidence interval on the mean of every column of a score matrix.
+
+    Same estimate as rouge_score's BootstrapAggregator: rows are resampled with replacement
+    `n_samples` times and low, mid and high are percentiles of the resampled means. The
+    resample indices of a block of samples are drawn in one call and turned into row counts,
+    so the means of the whole block are a single matrix product.
+
+    Args:
+        values (np.ndarray): (rows, measures) matrix of per-row scores, any metric.
+        confidence_interval (float): Width of the interval, 0.95 gives the 2.5th and 97.5th percentiles.
+        n_samples (int): Number of bootstrap samples.
+        seed (Optional[int]): Seed of the resampling, None draws a different resample every call.
+
+    Returns:
+        np.ndarray: (3, measures) matrix with the low, mid and high rows.
+    """
+    if confidence_interval < 0 or confidence_interval > 1:
+        raise ValueError("confidence_interval must be in range [0, 1]")
+    if n_samples <= 0:
+        raise ValueError("n_samples must be positive")
+
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    rows = len(values)
+    if rows == 0:
+        return np.full((3, values.shape[1]), np.nan)
+
+    rng = np.random.default_rng(seed)
+    sample_means = np.empty((n_samples, values.shape[1]))
+    block = max(1, min(n_samples, MAX_BLOCK_ELEMENTS // rows))
+    for start in range(0, n_samples, block):
+        size = min(block, n_samples - start)
+        indices = rng.integers(0, rows, size=(size, rows))
+        # Offset every sample's indices so one bincount gives the row counts of the whole block
+        indices += np.arange(size)[:, None] * rows
+        counts = np.bincount(indices.ravel(), minlength=size * rows).reshape(size, rows)
+        sample_means[start:start + size] = counts @ values / rows
+
+    delta = (1 - confidence_interval) / 2
+    return np.percentile(sample_means, 100 * np.array([delta, 0.5, 1 - delta]), axis=0)
+
+
+def aggregate(
+        scores: "pd.DataFrame",
+        columns: Optional[List[str]] = None,
+        confidence_interval: float = 0.95,
+        n_samples: int = 1000,
+        seed: Optional[int] = 0
+) -> "pd.DataFrame":
+    """
+    Bootstrap confidence intervals of any per-row metric columns (ROUGE, BERTScore, METEOR, WER).
+
+    Rows with a missing value in one of the columns are left out.
+
+    Args:
+        scores (pd.DataFrame): One row per sample.
+        columns (Optional[List[str]]): Metric columns to aggregate, defaults to every numeric column.
+        confidence_interval (float): Width of the interval.
+        n_samples (int): Number of bootstrap samples.
+        seed (Optional[int]): Seed of the resampling.
+
+    Returns:
+        pd.DataFrame: Indexed by low, mid and high, with one column per metric.
+    """
+    import pandas as pd
+
+    columns = columns or scores.select_dtypes("number").columns.tolist()
+    values = scores[columns].dropna()
+    if len(values) < len(scores):
+        logger.info(f"Leaving out {len(scores) - len(values)} rows with missing scores")
+
+    start_time = time.perf_counter()
+    intervals = bootstrap_intervals(values.to_numpy(), confidence_interval, n_samples, seed)
+    logger.info(f"Bootstrapped {len(columns)} metrics over {len(values)} rows in {time.perf_counter() - start_time:.2f}s")
+
+    return pd.DataFrame(intervals, index=list(BOUNDS), columns=columns)
+
+
+def aggregate_rouge(
+        scores: Union["pd.DataFrame", np.ndarray],
+        rouge_types: Sequence[str],
+        confidence_interval: float = 0.95,
+        n_samples: int = 1000,
+        seed: Optional[int] = 0
+) -> Dict[str, tuple]:
+    """
+    Aggregate per-row ROUGE scores into the output of BootstrapAggregator.aggregate().
+
+    Args:
+        scores (Union[pd.DataFrame, np.ndarray]): Output of `rouge_scores`, with `<type>_precision`, `<type>_recall`
+            and `<type>_fmeasure` columns, or a matrix holding these columns in that order.
+        rouge_types (Sequence[str]): ROUGE variants to aggregate.
+        confidence_interval (float): Width of the interval.
+        n_samples (int): Number of bootstrap samples.
+        seed (Optional[int]): Seed of the resampling.
+
+    Returns:
+        Dict[str, tuple]: ROUGE type -> AggregateScore of low, mid and high Scores.
+    """
+    from rouge_score import scoring
+
+    fields = ("precision", "recall", "fmeasure")
+    if hasattr(scores, "columns"):
+        columns = [f"{rouge_type}_{field}" for rouge_type in rouge_types for field in fields]
+        intervals = aggregate(scores, columns, confidence_interval, n_samples, seed).to_numpy()
+    else:
+        values = np.asarray(scores, dtype=np.float64).reshape(-1, len(fields) * len(rouge_types))
+        intervals = bootstrap_intervals(values, confidence_interval, n_samples, seed)
+
+    return {
+        rouge_type: scoring.AggregateScore(*(
+            scoring.Score(*intervals[bound, len(fields) * t:len(fields) * (t + 1)])
+            for bound in range(len(BOUNDS))
+        ))
+        for t, rouge_type in enumerate(rouge_types)
+    }
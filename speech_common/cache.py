@@ -0,0 +1,282 @@
+from speech_common.log import logger
+
+from contextlib import contextmanager
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import os
+
+
+# (path, size, mtime) -> content hash
+_file_hashes = {}
+
+
+def file_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of a file's content, read in blocks.
+
+    Hashes are remembered per (path, size, mtime), so a file is only read again after it changes.
+
+    Args:
+        file_path (str): Path to the file.
+        block_size (int): Bytes read at a time.
+
+    Returns:
+        str: Hex digest.
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key in _file_hashes:
+        return _file_hashes[memo_key]
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+
+    _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def text_hash(text: str) -> str:
+    """
+    SHA-256 of a text with its whitespace normalized, so re-spaced copies of a transcript match.
+
+    Args:
+        text (str): Text to hash.
+
+    Returns:
+        str: Hex digest.
+    """
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def cache_key(**parts: Any) -> str:
+    """
+    Build a cache key from JSON-serializable parts, independent of their order.
+
+    Returns:
+        str: Hex digest of the parts.
+    """
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+            self,
+            directory: str,
+            max_bytes: Optional[int] = None,
+            ttl: Optional[float] = None,
+            memory_items: int = 0
+            ):
+        """
+        Persistent cache of JSON results, content-addressed and shared across processes.
+
+        Values are stored as files under `directory`, indexed by a SQLite database holding
+        their size and last access time. When the total size exceeds `max_bytes`, the least
+        recently used entries are removed. An optional in-memory tier keeps the most recently
+        used values of this process, so repeated lookups do not touch the disk.
+
+        Args:
+            directory (str): Folder holding the index and the value files.
+            max_bytes (Optional[int]): Maximum total size of the stored values. None means unbounded.
+            ttl (Optional[float]): Seconds after which an entry expires. None means never.
+            memory_items (int): Number of values kept in memory, 0 disables the memory tier.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.memory_items = memory_items
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Created on first use, so importing the module never touches the disk
+        if not self._ready:
+            os.makedirs(os.path.join(self.directory, "blobs"), exist_ok=True)
+        connection = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), timeout=30)
+        if not self._ready:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._ready = True
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, "blobs", key[:2], key + ".json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Return the value stored under `key` and mark it as recently used.
+
+        Returns:
+            Optional[Any]: The stored value, or None on a miss or when it expired.
+        """
+        now = time.time()
+        with self._lock:
+            if key in self._memory:
+                value, created = self._memory[key]
+                if self.ttl is None or now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    self.memory_hits += 1
+                    return value
+                del self._memory[key]
+
+        with self._lock, self._connect() as connection:
+            row = connection.execute("SELECT created FROM entries WHERE key = ?", (key,)).fetchone()
+            created = row[0] if row is not None else now
+            if self.ttl is not None and now - created > self.ttl:
+                self._remove(connection, [key])
+                self.misses += 1
+                return None
+
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as file:
+                    value = json.load(file)
+            except (FileNotFoundError, ValueError):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            with connection:
+                connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            self._remember(key, value, created)
+        return value
+
+    def _remember(self, key: str, value: Any, created: float) -> None:
+        """
+        Keep a value in the memory tier, dropping the least recently used ones. Must hold the lock.
+        """
+        if not self.memory_items:
+            return
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a JSON-serializable value under `key`, evicting old entries if the cache is full.
+        """
+        data = json.dumps(value).encode("utf-8")
+        path = self._path(key)
+
+        with self._lock, self._connect() as connection:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Written to a temporary file first, readers never see a partial value
+            with open(path + ".tmp", "wb") as file:
+                file.write(data)
+            os.replace(path + ".tmp", path)
+
+            now = time.time()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, size, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, len(data), now, now)
+                )
+            self._remember(key, value, now)
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        """
+        Remove expired entries, then least recently used ones until the cache fits `max_bytes`. Must hold the lock.
+        """
+        if self.ttl is not None:
+            expired = [key for (key,) in connection.execute(
+                "SELECT key FROM entries WHERE created < ?", (time.time() - self.ttl,)
+            )]
+            self._remove(connection, expired)
+
+        if self.max_bytes is None:
+            return
+
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            if total <= self.max_bytes:
+                break
+            evicted.append(key)
+            total -= size
+
+        self._remove(connection, evicted)
+        logger.info(f"♻️ Evicted {len(evicted)} cached results from {self.directory}")
+
+    def _remove(self, connection: sqlite3.Connection, keys: List[str]) -> None:
+        """
+        Delete entries from the index, the disk and the memory tier. Must hold the lock.
+        """
+        with connection:
+            connection.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+        for key in keys:
+            self._memory.pop(key, None)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        """
+        Remove every entry.
+        """
+        with self._lock, self._connect() as connection:
+            self._remove(connection, [key for (key,) in connection.execute("SELECT key FROM entries")])
+            self._memory.clear()
+
+    def stats(self) -> dict:
+        """
+        Hit and miss counters of this process and the size of the cache.
+
+        Returns:
+            dict: hits (memory_hits of them from the memory tier), misses, hit_rate, entries and bytes.
+        """
+        with self._lock, self._connect() as connection:
+            entries, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "bytes": size,
+            }
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+CACHE_DIR = os.environ.get("RESULT_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "speech_recognition")
+
+# Transcriptions keyed by audio content, model and decoding options. Budget is configured through the environment.
+transcription_cache = ResultCache(
+    os.path.join(CACHE_DIR, "transcriptions"),
+    max_bytes=_env_int("TRANSCRIPTION_CACHE_MAX_BYTES") or 512 * 1024 * 1024
+)
+
+# Summaries keyed by transcript and generation settings, recent ones are also kept in memory
+summary_cache = ResultCache(
+    os.path.join(CACHE_DIR, "summaries"),
+    max_bytes=_env_int("SUMMARY_CACHE_MAX_BYTES") or 64 * 1024 * 1024,
+    ttl=_env_int("SUMMARY_CACHE_TTL") or 30 * 24 * 3600,
+    memory_items=256
+)
@@ -0,0 +1,449 @@
+from speech_common.log import logger
+
+from speech_common.cache import CACHE_DIR
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import threading
+import sqlite3
+import json
+import time
+import uuid
+import os
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED = (DONE, FAILED)
+
+
+class QueueFull(RuntimeError):
+    """
+    Raised by `JobQueue.submit` when `max_queued` jobs are already waiting.
+    """
+
+
+class JobContext:
+    def __init__(self, queue: "JobQueue", job_id: str):
+        """
+        Handle given to a running job to publish its progress and partial results.
+
+        Args:
+            queue (JobQueue): Queue the job belongs to.
+            job_id (str): Id of the running job.
+        """
+        self.queue = queue
+        self.job_id = job_id
+
+    def progress(self, fraction: float, message: Optional[str] = None) -> None:
+        """
+        Report the completed fraction of the job, between 0 and 1, and an optional status message.
+        """
+        self.queue._update(self.job_id, progress=min(max(fraction, 0.0), 1.0), message=message)
+
+    def segment(self, start: float, end: float, text: str) -> None:
+        """
+        Publish a partial result, readable with `JobQueue.segments` before the job finishes.
+        """
+        self.queue._add_segment(self.job_id, start, end, text)
+
+
+class JobQueue:
+    def __init__(
+            self,
+            path: str,
+            workers: int = 2,
+            limits: Optional[Dict[str, int]] = None,
+            max_queued: Optional[int] = None,
+            retention: float = 24 * 3600,
+            poll_interval: float = 0.5,
+            heartbeat_interval: float = 10.0,
+            stale_after: float = 60.0
+            ):
+        """
+        Local job queue stored in SQLite, served by a pool of worker threads.
+
+        Jobs are submitted with a kind and JSON-serializable arguments and get an id straight
+        away; the caller polls `get` and `segments` for progress, partial segments and the final
+        result, so a Streamlit session never blocks on a long transcription. Workers are threads
+        of the app process, they share the models loaded in the registry. Several processes may
+        share the database: a running job records the process that claimed it and a heartbeat
+        that process refreshes, and jobs whose heartbeat is older than `stale_after` belong to a
+        process that stopped and are queued again. Apps sharing the database only count and
+        claim the kinds of jobs they registered.
+
+        Args:
+            path (str): SQLite database file.
+            workers (int): Number of worker threads, the total number of jobs running at once.
+            limits (Optional[Dict[str, int]]): Maximum jobs of a kind running at once. Kinds not listed are only bound by `workers`.
+            max_queued (Optional[int]): Maximum waiting jobs before `submit` raises QueueFull. None means unbounded.
+            retention (float): Seconds a finished job and its segments are kept.
+            poll_interval (float): Seconds an idle worker waits before looking for jobs submitted by other processes.
+            heartbeat_interval (float): Seconds between two heartbeats of the running jobs.
+            stale_after (float): Seconds without heartbeat after which a running job is queued again.
+        """
+        self.path = path
+        self.workers = max(workers, 1)
+        self.limits = dict(limits or {})
+        self.max_queued = max_queued
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = max(stale_after, 2 * heartbeat_interval)
+        # Identifies the jobs this queue claimed, unique across processes and restarts
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, Callable[..., Any]] = {}
+        self._running: Dict[str, int] = {}
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # Bumped on every submit and freed slot, a worker that found no job only sleeps if
+        # nothing changed since it looked
+        self._generation = 0
+        self._ready = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Created on first use, so importing the module never touches the disk
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=30)
+        if not self._ready:
+            # Readers polling progress do not wait for the workers' writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL, "
+                "progress REAL NOT NULL DEFAULT 0, message TEXT, result TEXT, error TEXT, "
+                "created REAL NOT NULL, started REAL, finished REAL, owner TEXT, heartbeat REAL)"
+            )
+            # Databases created before claims had an owner
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS segments ("
+                "job_id TEXT NOT NULL, seq INTEGER NOT NULL, start REAL NOT NULL, end REAL NOT NULL, text TEXT NOT NULL, "
+                "PRIMARY KEY (job_id, seq))"
+            )
+            self._ready = True
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def register(self, kind: str, handler: Callable[..., Any]) -> None:
+        """
+        Set the function running the jobs of a kind.
+
+        Args:
+            kind (str): Job kind.
+            handler (Callable[..., Any]): Called as handler(context, **payload), returns the JSON-serializable result.
+        """
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        """
+        Start the worker threads. Only the first call in a process does anything; Streamlit reruns can call this freely.
+        """
+        with self._lock:
+            if self._threads:
+                return
+
+            with self._connect() as connection, connection:
+                self._requeue_stale(connection)
+                self._purge(connection)
+
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"👷 Started {self.workers} job workers, limits {self.limits or 'none'}")
+
+    def submit(self, kind: str, **payload: Any) -> str:
+        """
+        Queue a job and return its id.
+
+        Raises:
+            KeyError: When no handler is registered for `kind`.
+            QueueFull: When `max_queued` jobs are already waiting.
+
+        Returns:
+            str: Job id, to poll with `get` and `segments`.
+        """
+        if kind not in self._handlers:
+            raise KeyError(f"No handler registered for job kind '{kind}'")
+        self.start()
+
+        job_id = uuid.uuid4().hex
+        kinds, params = self._kinds()
+        with self._connect() as connection:
+            if self.max_queued is not None:
+                queued = connection.execute(
+                    f"SELECT COUNT(*) FROM jobs WHERE status = ? AND {kinds}", (QUEUED, *params)
+                ).fetchone()[0]
+                if queued >= self.max_queued:
+                    raise QueueFull(f"{queued} jobs are already waiting, try again later")
+
+            with connection:
+                connection.execute(
+                    "INSERT INTO jobs (id, kind, status, payload, created) VALUES (?, ?, ?, ?, ?)",
+                    (job_id, kind, QUEUED, json.dumps(payload), time.time())
+                )
+
+        with self._lock:
+            self._generation += 1
+            self._wakeup.notify()
+
+        logger.info(f"📥 Queued {kind} job {job_id}")
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """
+        Current state of a job.
+
+        Returns:
+            Optional[dict]: id, kind, status, progress, message, result, error, created, started, finished
+            and, while it waits, its position in the queue. None for an unknown id.
+        """
+        with self._connect() as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+
+            job = dict(row)
+            job["payload"] = json.loads(job["payload"])
+            job["result"] = json.loads(job["result"]) if job["result"] is not None else None
+            if job["status"] == QUEUED:
+                kinds, params = self._kinds()
+                job["position"] = connection.execute(
+                    f"SELECT COUNT(*) FROM jobs WHERE status = ? AND created < ? AND {kinds}",
+                    (QUEUED, job["created"], *params)
+                ).fetchone()[0]
+            return job
+
+    def segments(self, job_id: str, offset: int = 0) -> List[Tuple[float, float, str]]:
+        """
+        Partial segments a job published, in order.
+
+        Args:
+            job_id (str): Job id.
+            offset (int): Number of segments already read, only newer ones are returned.
+
+        Returns:
+            List[Tuple[float, float, str]]: (start, end, text) of every segment.
+        """
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT start, end, text FROM segments WHERE job_id = ? AND seq >= ? ORDER BY seq", (job_id, offset)
+            ).fetchall()
+
+    def metrics(self) -> dict:
+        """
+        Queue depth and throughput figures of the registered kinds.
+
+        Returns:
+            dict: queued, running, done and failed job counts, the same counts per kind, the wait
+            of the oldest queued job and the mean wait and run time of jobs finished in the last hour,
+            all in seconds, and the configured workers and limits.
+        """
+        now = time.time()
+        registered, params = self._kinds()
+        with self._connect() as connection:
+            counts = {status: 0 for status in (QUEUED, RUNNING, DONE, FAILED)}
+            kinds: Dict[str, Dict[str, int]] = {}
+            for kind, status, count in connection.execute(
+                    f"SELECT kind, status, COUNT(*) FROM jobs WHERE {registered} GROUP BY kind, status", params
+            ):
+                counts[status] = counts.get(status, 0) + count
+                kinds.setdefault(kind, {})[status] = count
+
+            oldest = connection.execute(
+                f"SELECT MIN(created) FROM jobs WHERE status = ? AND {registered}", (QUEUED, *params)
+            ).fetchone()[0]
+            mean_wait, mean_run = connection.execute(
+                "SELECT AVG(started - created), AVG(finished - started) FROM jobs "
+                f"WHERE finished > ? AND started IS NOT NULL AND {registered}",
+                (now - 3600, *params)
+            ).fetchone()
+
+        return {
+            **counts,
+            "kinds": kinds,
+            "oldest_wait": now - oldest if oldest is not None else 0.0,
+            "mean_wait": mean_wait or 0.0,
+            "mean_run": mean_run or 0.0,
+            "workers": self.workers,
+            "limits": self.limits,
+        }
+
+    def _kinds(self) -> Tuple[str, tuple]:
+        """
+        SQL condition keeping the jobs of the kinds registered on this queue, and its parameters.
+        """
+        kinds = tuple(self._handlers)
+        return f"kind IN ({', '.join('?' * len(kinds))})", kinds
+
+    # Writes of a running job only apply while this queue owns it, a job requeued after a stall
+    # and claimed by another process is not overwritten by the stalled run
+    def _update(self, job_id: str, **fields: Any) -> bool:
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as connection, connection:
+            return connection.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ? AND owner = ?", (*fields.values(), job_id, self.owner)
+            ).rowcount > 0
+
+    def _add_segment(self, job_id: str, start: float, end: float, text: str) -> None:
+        with self._connect() as connection, connection:
+            connection.execute(
+                "INSERT INTO segments (job_id, seq, start, end, text) "
+                "SELECT ?, (SELECT COUNT(*) FROM segments WHERE job_id = ?), ?, ?, ? FROM jobs WHERE id = ? AND owner = ?",
+                (job_id, job_id, start, end, text, job_id, self.owner)
+            )
+
+    def _requeue_stale(self, connection: sqlite3.Connection) -> None:
+        """
+        Queue again the running jobs whose heartbeat stopped, dropping their partial segments.
+        """
+        stale = "SELECT id FROM jobs WHERE status = ? AND (heartbeat IS NULL OR heartbeat < ?)"
+        params = (RUNNING, time.time() - self.stale_after)
+        connection.execute(f"DELETE FROM segments WHERE job_id IN ({stale})", params)
+        requeued = connection.execute(
+            f"UPDATE jobs SET status = ?, progress = 0, message = NULL, started = NULL, owner = NULL, heartbeat = NULL "
+            f"WHERE id IN ({stale})", (QUEUED, *params)
+        ).rowcount
+        if requeued:
+            logger.info(f"🔁 Requeued {requeued} jobs of stopped processes")
+
+    def _heartbeat(self) -> None:
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self._connect() as connection, connection:
+                    connection.execute(
+                        "UPDATE jobs SET heartbeat = ? WHERE owner = ? AND status = ?", (time.time(), self.owner, RUNNING)
+                    )
+                    self._requeue_stale(connection)
+                    self._purge(connection)
+            except sqlite3.Error as e:
+                logger.error(f"🚨 Failed to refresh the job heartbeats: {e}")
+
+    def _purge(self, connection: sqlite3.Connection) -> None:
+        """
+        Delete finished jobs older than `retention` with their segments.
+        """
+        old = "SELECT id FROM jobs WHERE status IN (?, ?) AND finished < ?"
+        params = (*FINISHED, time.time() - self.retention)
+        connection.execute(f"DELETE FROM segments WHERE job_id IN ({old})", params)
+        connection.execute(f"DELETE FROM jobs WHERE id IN ({old})", params)
+
+    def _reserve(self, kind: str) -> bool:
+        """
+        Take a running slot of `kind` if it is under its limit. Must hold the lock.
+        """
+        if kind in self.limits and self._running.get(kind, 0) >= self.limits[kind]:
+            return False
+        self._running[kind] = self._running.get(kind, 0) + 1
+        return True
+
+    def _release(self, kind: str) -> None:
+        with self._lock:
+            self._running[kind] -= 1
+            self._generation += 1
+            # A slot of this kind is free, a job waiting for it can start
+            self._wakeup.notify_all()
+
+    def _claim(self) -> Optional[Tuple[str, str, dict]]:
+        """
+        Mark the oldest queued job whose kind is under its limit as running.
+
+        The lock is only held to take a slot, never during database I/O, so a busy database
+        does not block `submit` or the other workers.
+        """
+        kinds, params = self._kinds()
+        with self._connect() as connection:
+            # Jobs of kinds another app registered on the same database are left to that app
+            candidates = connection.execute(
+                f"SELECT id, kind, payload FROM jobs WHERE status = ? AND {kinds} ORDER BY created", (QUEUED, *params)
+            ).fetchall()
+
+            for job_id, kind, payload in candidates:
+                with self._lock:
+                    if not self._reserve(kind):
+                        continue
+
+                try:
+                    now = time.time()
+                    with connection:
+                        # Another process may have claimed it in the meantime
+                        claimed = connection.execute(
+                            "UPDATE jobs SET status = ?, started = ?, owner = ?, heartbeat = ? WHERE id = ? AND status = ?",
+                            (RUNNING, now, self.owner, now, job_id, QUEUED)
+                        ).rowcount
+                except BaseException:
+                    self._release(kind)
+                    raise
+                if claimed:
+                    return job_id, kind, json.loads(payload)
+                self._release(kind)
+        return None
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                generation = self._generation
+            try:
+                job = self._claim()
+            except sqlite3.Error as e:
+                logger.error(f"🚨 Failed to read the job queue: {e}")
+                job = None
+            if job is None:
+                with self._lock:
+                    if generation == self._generation:
+                        self._wakeup.wait(self.poll_interval)
+                continue
+
+            job_id, kind, payload = job
+            start = time.perf_counter()
+            try:
+                result = self._handlers[kind](JobContext(self, job_id), **payload)
+                if self._update(job_id, status=DONE, progress=1.0, result=json.dumps(result), finished=time.time()):
+                    logger.info(f"✅ {kind} job {job_id} done in {time.perf_counter() - start:.1f}s")
+                else:
+                    logger.warning(f"⚠️ {kind} job {job_id} was requeued while it ran, its result is dropped")
+            except Exception as e:
+                self._update(job_id, status=FAILED, error=str(e), finished=time.time())
+                logger.error(f"🚨 {kind} job {job_id} failed: {e}")
+            finally:
+                self._release(kind)
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+def _env_limits(name: str) -> Dict[str, int]:
+    """
+    Parse per-kind concurrency limits written as "kind=limit,kind=limit".
+    """
+    limits = {}
+    for item in (os.environ.get(name) or "").split(","):
+        if "=" in item:
+            kind, limit = item.split("=", 1)
+            limits[kind.strip()] = int(limit)
+    return limits
+
+
+# Jobs of the Streamlit app, sized through the environment
+job_queue = JobQueue(
+    os.environ.get("JOB_QUEUE_PATH") or os.path.join(CACHE_DIR, "jobs.sqlite"),
+    workers=_env_int("JOB_WORKERS") or 2,
+    limits=_env_limits("JOB_LIMITS"),
+    max_queued=_env_int("JOB_QUEUE_MAX_QUEUED") or 100
+)
@@ -0,0 +1,107 @@
+from speech_common.log import logger
+
+from typing import Any, Callable, Dict, List, Optional
+import threading
+import time
+import os
+
+_lock = threading.Lock()
+_ready = threading.Event()
+_thread = None
+_errors = {}
+
+
+def configured_models(default: List[str]) -> List[str]:
+    """
+    Read the models to prewarm from the PREWARM_MODELS environment variable.
+
+    Args:
+        default (List[str]): Models used when the variable is not set.
+
+    Returns:
+        List[str]: Model names. An empty PREWARM_MODELS disables prewarming.
+    """
+    value = os.environ.get("PREWARM_MODELS")
+    if value is None:
+        return default
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def prewarm(loaders: Dict[str, Callable[[], Any]]) -> threading.Event:
+    """
+    Load models in a background thread so the first request does not pay for it.
+
+    Only the first call in a process starts the thread; Streamlit reruns can call this freely.
+
+    Args:
+        loaders (Dict[str, Callable[[], Any]]): Display name mapped to a function that loads the model.
+
+    Returns:
+        threading.Event: Set once every loader has finished.
+    """
+    global _thread
+
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(loaders,), name="model-prewarm", daemon=True)
+            _thread.start()
+
+    return _ready
+
+
+def _run(loaders: Dict[str, Callable[[], Any]]) -> None:
+    started = time.perf_counter()
+
+    for name, loader in loaders.items():
+        start = time.perf_counter()
+        try:
+            loader()
+            logger.info(f"🔥 Prewarmed {name} in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            _errors[name] = str(e)
+            logger.error(f"🚨 Failed to prewarm {name}: {e}")
+
+    _ready.set()
+    logger.info(f"✅ Models ready after {time.perf_counter() - started:.1f}s")
+
+    # File based readiness probe for container orchestrators
+    ready_file = os.environ.get("PREWARM_READY_FILE")
+    if ready_file:
+        with open(ready_file, "w") as f:
+            f.write("ready\n")
+
+
+def is_ready() -> bool:
+    """
+    Readiness flag: True once prewarming has finished, or when it was never started.
+    """
+    return _thread is None or _ready.is_set()
+
+
+def wait_until_ready(timeout: Optional[float] = None) -> bool:
+    """
+    Block until prewarming has finished.
+
+    Args:
+        timeout (Optional[float]): Maximum number of seconds to wait.
+
+    Returns:
+        bool: True when the models are ready.
+    """
+    if _thread is None:
+        return True
+    return _ready.wait(timeout)
+
+
+def status() -> dict:
+    """
+    Report the prewarm state, e.g. for a health endpoint.
+
+    Returns:
+        dict: Whether prewarming started, whether it is done and the models that failed to load.
+    """
+    return {
+        "started": _thread is not None,
+        "ready": is_ready(),
+        "errors": dict(_errors),
+    }
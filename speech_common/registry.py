@@ -0,0 +1,221 @@
+from speech_common.log import logger
+
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+import threading
+import gc
+import os
+
+
+# Approximate parameter counts of the Whisper checkpoints, used to size a model before it is loaded.
+WHISPER_PARAMETERS = {
+    "tiny": 39_000_000,
+    "tiny.en": 39_000_000,
+    "base": 74_000_000,
+    "base.en": 74_000_000,
+    "small": 244_000_000,
+    "small.en": 244_000_000,
+    "medium": 769_000_000,
+    "medium.en": 769_000_000,
+    "large": 1_550_000_000,
+    "large-v2": 1_550_000_000,
+    "large-v3": 1_550_000_000,
+    "turbo": 809_000_000,
+}
+
+BYTES_PER_PARAMETER = {
+    "int8": 1,
+    "int8_float16": 1,
+    "float16": 2,
+    "float32": 4,
+    "default": 4,
+}
+
+
+def whisper_size_hint(model_type: str, compute_type: str = "default") -> Optional[int]:
+    """
+    Estimate the in-memory size of a Whisper checkpoint.
+
+    Args:
+        model_type (str): Whisper model name, e.g. "medium" or "large".
+        compute_type (str): Weight precision, e.g. "int8" or "float32".
+
+    Returns:
+        Optional[int]: Estimated size in bytes, or None when the model is unknown.
+    """
+    parameters = WHISPER_PARAMETERS.get(model_type)
+    if parameters is None:
+        return None
+    return parameters * BYTES_PER_PARAMETER.get(compute_type, 4)
+
+
+def estimate_size(model: Any) -> int:
+    """
+    Estimate the memory used by a loaded model from its torch parameters.
+
+    Args:
+        model (Any): A torch module, a transformers pipeline, a tuple of those or any other model object.
+
+    Returns:
+        int: Size in bytes, or 0 when it cannot be determined.
+    """
+    if isinstance(model, (tuple, list)):
+        return sum(estimate_size(part) for part in model)
+    if hasattr(model, "model") and not hasattr(model, "parameters"):
+        model = model.model  # transformers pipeline
+    if hasattr(model, "parameters"):
+        try:
+            return sum(p.numel() * p.element_size() for p in model.parameters())
+        except Exception:
+            return 0
+    return 0
+
+
+class ModelRegistry:
+    def __init__(
+            self,
+            max_models: Optional[int] = None,
+            max_bytes: Optional[int] = None
+            ):
+        """
+        Process-wide cache of loaded models, shared across threads and Streamlit sessions.
+
+        Models are keyed by (backend, name, device, compute_type) and loaded once. When the
+        number of models or their total size exceeds the budget, the least recently used ones
+        are evicted.
+
+        Args:
+            max_models (Optional[int]): Maximum number of models kept loaded. None means unbounded.
+            max_bytes (Optional[int]): Maximum total size of loaded models in bytes. None means unbounded.
+        """
+        self.max_models = max_models
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()
+        self._loading = {}
+        self._lock = threading.Lock()
+
+    def get(
+            self,
+            backend: str,
+            name: str,
+            loader: Callable[[], Any],
+            device: str = "cpu",
+            compute_type: str = "default",
+            size_hint: Optional[int] = None
+            ) -> Any:
+        """
+        Return a cached model, loading it with `loader` on first use.
+
+        Concurrent callers asking for the same key wait for a single load instead of loading
+        the weights twice.
+
+        Args:
+            backend (str): Library that provides the model, e.g. "faster-whisper" or "transformers".
+            name (str): Model name or path.
+            loader (Callable[[], Any]): Function that builds the model.
+            device (str): Device the model is loaded on.
+            compute_type (str): Weight precision of the model.
+            size_hint (Optional[int]): Expected size in bytes, used to make room before loading.
+
+        Returns:
+            Any: The loaded model.
+        """
+        key = (backend, name, device, compute_type)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+                self._evict(incoming_models=1, incoming_bytes=size_hint or 0)
+
+            logger.info(f"📦 Loading {backend} model '{name}' on {device} ({compute_type})")
+            model = loader()
+            size = size_hint or estimate_size(model)
+
+            with self._lock:
+                self._models[key] = (model, size)
+                self._loading.pop(key, None)
+                self._evict(keep=key)
+
+        return model
+
+    def _evict(self, incoming_models: int = 0, incoming_bytes: int = 0, keep: Optional[tuple] = None) -> None:
+        """
+        Drop least recently used models until the registry fits its budget. Must hold the lock.
+        """
+        evicted = False
+
+        while self._models:
+            over_count = self.max_models is not None and len(self._models) + incoming_models > self.max_models
+            over_bytes = self.max_bytes is not None and self.total_bytes + incoming_bytes > self.max_bytes
+            if not (over_count or over_bytes):
+                break
+
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            _, size = self._models.pop(oldest)
+            evicted = True
+            logger.info(f"♻️ Evicted model {oldest} ({size / 1e6:.0f} MB)")
+
+        if evicted:
+            gc.collect()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def evict(self, backend: str, name: str, device: str = "cpu", compute_type: str = "default") -> bool:
+        """
+        Remove one model from the registry.
+
+        Returns:
+            bool: True when the model was loaded and has been removed.
+        """
+        with self._lock:
+            removed = self._models.pop((backend, name, device, compute_type), None)
+        if removed is not None:
+            gc.collect()
+        return removed is not None
+
+    def clear(self) -> None:
+        """
+        Remove every model from the registry.
+        """
+        with self._lock:
+            self._models.clear()
+        gc.collect()
+
+    def loaded(self) -> list:
+        """
+        List the keys of the loaded models, least recently used first.
+        """
+        with self._lock:
+            return list(self._models)
+
+    def __contains__(self, key: tuple) -> bool:
+        with self._lock:
+            return key in self._models
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._models)
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else None
+
+
+# Shared by every caller in the process. Budget is configured through the environment.
+registry = ModelRegistry(
+    max_models=_env_int("MODEL_REGISTRY_MAX_MODELS") or 3,
+    max_bytes=_env_int("MODEL_REGISTRY_MAX_BYTES"),
+)
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    A transcribed piece of speech.
+
+    Attributes:
+        start (float): Start time in seconds.
+        end (float): End time in seconds.
+        text (str): Transcribed text, with Whisper's leading space.
+    """
+    start: float
+    end: float
+    text: str
+
+    def __str__(self) -> str:
+        return f"[{self.start:.2f}s -> {self.end:.2f}s] {self.text}"
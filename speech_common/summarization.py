@@ -0,0 +1,272 @@
+from speech_common.log import logger
+
+from typing import Any, Callable, List, Optional, Tuple
+import time
+import re
+
+# Room left in a window for special tokens and the small drift between summed and joined token counts
+WINDOW_MARGIN_TOKENS = 16
+
+
+def window_tokens(tokenizer: Any) -> int:
+    """
+    Largest number of input tokens packed into one summarization window.
+
+    Args:
+        tokenizer (Any): Tokenizer of the summarization model.
+
+    Returns:
+        int: Window size in tokens.
+    """
+    return min(getattr(tokenizer, "model_max_length", None) or 1024, 1024) - WINDOW_MARGIN_TOKENS
+
+
+def token_lengths(tokenizer: Any, texts: List[str]) -> List[int]:
+    """
+    Count the tokens of every text in a single tokenizer call.
+
+    Args:
+        tokenizer (Any): Tokenizer of the summarization model.
+        texts (List[str]): Texts to measure.
+
+    Returns:
+        List[int]: Number of tokens per text, capped at the model's maximum input length.
+    """
+    input_ids = tokenizer(texts, truncation=False)["input_ids"]
+    max_length = getattr(tokenizer, "model_max_length", None) or 1024
+    return [min(len(ids), max_length) for ids in input_ids]
+
+
+def length_buckets(
+        lengths: List[int],
+        batch_size: int,
+        max_batch_tokens: Optional[int] = None
+        ) -> List[List[int]]:
+    """
+    Group text indices into batches of similar token length to keep padding small.
+
+    Args:
+        lengths (List[int]): Token length of every text.
+        batch_size (int): Maximum number of texts per batch.
+        max_batch_tokens (Optional[int]): Maximum padded tokens (rows * longest row) per batch.
+
+    Returns:
+        List[List[int]]: Indices into `lengths`, shortest texts first.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+
+    buckets, bucket = [], []
+    for index in order:
+        # Texts are sorted, so the current one is the longest of the bucket
+        padded_tokens = (len(bucket) + 1) * lengths[index]
+        if bucket and (len(bucket) >= batch_size or (max_batch_tokens and padded_tokens > max_batch_tokens)):
+            buckets.append(bucket)
+            bucket = []
+        bucket.append(index)
+
+    if bucket:
+        buckets.append(bucket)
+    return buckets
+
+
+def _summarize_one(summarizer: Any, text: str, **generate_kwargs) -> str:
+    try:
+        return summarizer(text, truncation=True, **generate_kwargs)[0]["summary_text"]
+    except Exception as e:
+        return f"[ERROR] {e}"
+
+
+def summarize_batch(
+        summarizer: Any,
+        texts: List[str],
+        prefix: str = "",
+        batch_size: int = 8,
+        max_batch_tokens: Optional[int] = None,
+        length_fn: Optional[Callable[[int], Tuple[int, int]]] = None,
+        **generate_kwargs
+        ) -> List[str]:
+    """
+    Summarize many texts with padded batches of similar length.
+
+    Texts are sorted by token length and grouped into buckets so each batch carries little
+    padding. A failing batch is retried item by item, and items that still fail are returned
+    as "[ERROR] <message>" instead of aborting the whole run.
+
+    Args:
+        summarizer (Any): transformers summarization pipeline (pegasus-xsum, bart-large-cnn, t5-base, ...).
+        texts (List[str]): Texts to summarize.
+        prefix (str): Task prefix added to every text, e.g. "summarize: " for T5.
+        batch_size (int): Maximum number of texts per forward pass.
+        max_batch_tokens (Optional[int]): Maximum padded tokens per forward pass.
+        length_fn (Optional[Callable[[int], Tuple[int, int]]]): Computes (max_length, min_length) from the
+            token count of the longest text of a bucket. When omitted, `generate_kwargs` decides the output length.
+        **generate_kwargs: Extra arguments for the pipeline, e.g. max_length or do_sample.
+
+    Returns:
+        List[str]: Summaries in the same order as `texts`.
+    """
+    results = [None] * len(texts)
+
+    valid = []
+    for index, text in enumerate(texts):
+        if isinstance(text, str):
+            valid.append(index)
+        else:
+            results[index] = f"[ERROR] Expected a string, got {type(text).__name__}"
+
+    inputs = [prefix + texts[index].strip() for index in valid]
+    if not inputs:
+        return results
+
+    lengths = token_lengths(summarizer.tokenizer, inputs)
+    buckets = length_buckets(lengths, batch_size, max_batch_tokens)
+    logger.info(f"Summarizing {len(inputs)} texts in {len(buckets)} length-sorted batches")
+
+    start = time.perf_counter()
+    for bucket in buckets:
+        batch = [inputs[i] for i in bucket]
+        kwargs = dict(generate_kwargs)
+        if length_fn is not None:
+            kwargs["max_length"], kwargs["min_length"] = length_fn(lengths[bucket[-1]])
+
+        try:
+            outputs = summarizer(batch, batch_size=len(batch), truncation=True, **kwargs)
+            summaries = [output["summary_text"] for output in outputs]
+        except Exception as e:
+            logger.warning(f"⚠️ Batch of {len(batch)} failed ({e}), retrying one by one")
+            summaries = [_summarize_one(summarizer, text, **kwargs) for text in batch]
+
+        for i, summary in zip(bucket, summaries):
+            results[valid[i]] = summary
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"✅ Summarized {len(inputs)} texts in {elapsed:.1f}s ({len(inputs) / max(elapsed, 1e-9):.2f} texts/s)")
+    return results
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split a transcript into sentences, used as window units when no Whisper segments are available.
+    """
+    return [sentence for sentence in re.split(r'(?<=[.!?])\s+', text.strip()) if sentence]
+
+
+def token_windows(
+        tokenizer: Any,
+        units: List[str],
+        max_tokens: int,
+        overlap_tokens: int = 0
+        ) -> List[str]:
+    """
+    Pack text units (Whisper segments or sentences) into overlapping windows under a token budget.
+
+    Windows only break between units. A unit longer than the budget is split on word boundaries.
+
+    Args:
+        tokenizer (Any): Tokenizer of the summarization model.
+        units (List[str]): Text units in reading order.
+        max_tokens (int): Token budget of a window.
+        overlap_tokens (int): Tokens of trailing units repeated at the start of the next window,
+            at most half the budget so every window makes progress.
+
+    Returns:
+        List[str]: Windows in reading order.
+    """
+    units = [unit.strip() for unit in units if unit and unit.strip()]
+    if not units:
+        return []
+
+    overlap_tokens = min(overlap_tokens, max_tokens // 2)
+
+    counts = [len(ids) for ids in tokenizer(units, add_special_tokens=False)["input_ids"]]
+
+    pieces, piece_counts = [], []
+    for unit, count in zip(units, counts):
+        if count <= max_tokens:
+            pieces.append(unit)
+            piece_counts.append(count)
+            continue
+
+        words = unit.split()
+        words_per_piece = max(1, len(words) * max_tokens // count)
+        for i in range(0, len(words), words_per_piece):
+            chunk = words[i:i + words_per_piece]
+            pieces.append(" ".join(chunk))
+            piece_counts.append(-(-count * len(chunk) // len(words)))
+
+    windows = []
+    start = 0
+    while start < len(pieces):
+        end, total = start, 0
+        while end < len(pieces) and (end == start or total + piece_counts[end] <= max_tokens):
+            total += piece_counts[end]
+            end += 1
+        windows.append(" ".join(pieces[start:end]))
+
+        if end >= len(pieces):
+            break
+
+        # Step back over trailing units so consecutive windows share context
+        back, overlap = end, 0
+        while back - 1 > start and overlap + piece_counts[back - 1] <= overlap_tokens:
+            back -= 1
+            overlap += piece_counts[back]
+        start = back
+
+    return windows
+
+
+def summarize_long(
+        summarizer: Any,
+        units: List[str],
+        length_fn: Callable[[int], Tuple[int, int]],
+        batch_size: int = 8,
+        overlap_tokens: int = 64,
+        max_levels: int = 4,
+        **generate_kwargs
+        ) -> str:
+    """
+    Map-reduce summarization for texts longer than the model context.
+
+    The units are packed into overlapping windows that fit the encoder, the windows are
+    summarized in batches, and the partial summaries are reduced level by level until they
+    fit in a single window. Texts that already fit are summarized directly.
+
+    Args:
+        summarizer (Any): transformers summarization pipeline.
+        units (List[str]): Whisper segments or sentences of the transcript, in order.
+        length_fn (Callable[[int], Tuple[int, int]]): Computes (max_length, min_length) from an input token count.
+        batch_size (int): Maximum number of windows per forward pass.
+        overlap_tokens (int): Tokens shared between consecutive windows of the transcript.
+        max_levels (int): Maximum number of reduce levels before the remaining text is truncated.
+        **generate_kwargs: Extra arguments for the pipeline, e.g. do_sample.
+
+    Returns:
+        str: Summary of the whole text.
+    """
+    tokenizer = summarizer.tokenizer
+    max_tokens = window_tokens(tokenizer)
+
+    windows = token_windows(tokenizer, units, max_tokens, overlap_tokens)
+    for level in range(max_levels):
+        if len(windows) <= 1:
+            break
+
+        logger.info(f"Reduce level {level + 1}: summarizing {len(windows)} windows")
+        partials = summarize_batch(summarizer, windows, batch_size=batch_size, length_fn=length_fn, **generate_kwargs)
+        partials = [partial for partial in partials if not partial.startswith("[ERROR]")]
+        if not partials:
+            raise RuntimeError("Every window failed to summarize")
+
+        windows = token_windows(tokenizer, partials, max_tokens)
+    else:
+        if len(windows) > 1:
+            logger.warning(f"⚠️ Still {len(windows)} windows after {max_levels} levels, truncating the rest")
+
+    text = " ".join(windows)
+    num_tokens = min(len(tokenizer(text, add_special_tokens=False)["input_ids"]), max_tokens)
+    max_length, min_length = length_fn(num_tokens)
+
+    logger.info(f"Summarizing {num_tokens} tokens with max_length={max_length}, min_length={min_length}")
+    summary = summarizer(text, truncation=True, max_length=max_length, min_length=min_length, **generate_kwargs)
+    return summary[0]['summary_text']
@@ -0,0 +1,23 @@
+from functools import lru_cache
+from typing import List
+
+
+class CachedTokenizer:
+    def __init__(self, use_stemmer: bool = True):
+        """
+        rouge_score's default tokenization, remembering the stem of every word seen.
+
+        Transcripts and summaries repeat the same words over and over, so each distinct word
+        is stemmed once per process. Can be passed to RougeScorer(tokenizer=...).
+
+        Args:
+            use_stemmer (bool): Stem tokens longer than 3 characters, like RougeScorer(use_stemmer=True).
+        """
+        from nltk.stem import porter
+
+        self.stem = lru_cache(maxsize=None)(porter.PorterStemmer().stem) if use_stemmer else None
+
+    def tokenize(self, text: str) -> List[str]:
+        from rouge_score import tokenize
+
+        return tokenize.tokenize(text, self if self.stem else None)
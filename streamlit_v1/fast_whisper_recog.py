@@ -1,22 +1,25 @@
-from faster_whisper import WhisperModel
 import streamlit as st
-import numpy as np
-import torch
-from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
-from transformers import MarianMTModel, MarianTokenizer
-from langdetect import detect
 import re
-import torch
-import sentencepiece
 
+# faster_whisper and transformers (torch) are imported inside the loaders below, on first use
+# or by the background prewarm thread, so the page renders without waiting for them.
 from script.download import download_youtube_video_as_mp3
-from script.eval_summ import rouge_eval
+from script.eval_summ import format_eval, rouge_eval
+from speech_common import prewarm
+from speech_common.cache import cache_key, summary_cache, text_hash
+from speech_common.jobs import QueueFull, job_queue
+from speech_common.registry import registry, whisper_size_hint
 
 import os
+import shutil
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
 import time
 
+MODEL_TYPES = ["large","medium", "medium.en", "small", "small.en", "base", "base.en", "tiny.en", "tiny"]
+
+AUDIO_FOLDER = "audio_temp"
+
 
 def load_model(type:str):
     """
@@ -26,16 +29,47 @@ def load_model(type:str):
         type (str): type of model "medium", "medium.en", "small", "small.en", "base", "base.en", "tiny.en", "tiny".
 
     Returns:
-        model: WhisperModel for speech recognition.
+        model: WhisperModel for speech recognition, shared through the model registry.
     """
-    return WhisperModel(type, device="cpu", compute_type="int8")
+    from faster_whisper import WhisperModel
+
+    return registry.get(
+        "faster-whisper",
+        type,
+        lambda: WhisperModel(type, device="cpu", compute_type="int8"),
+        device="cpu",
+        compute_type="int8",
+        size_hint=whisper_size_hint(type, "int8")
+    )
+
+def load_summarizer():
+    """
+    Load the pegasus summarization pipeline.
 
-def transcribe_model(file_path:str, type:str) -> str:
+    Returns:
+        pipeline: summarization pipeline, shared through the model registry.
     """
-    Transcribe text from speech.
+    from transformers import pipeline
+
+    return registry.get(
+        "transformers",
+        "google/pegasus-xsum",
+        lambda: pipeline(
+            "summarization",
+            model="google/pegasus-xsum",
+            tokenizer="google/pegasus-xsum",
+            use_fast=False
+        )
+    )
+
+def transcribe_model(file_path:str, type:str, context) -> str:
+    """
+    Transcribe text from speech, publishing every segment to the job as it is decoded.
 
     Args:
         file_path (str): file path of the audio media.
+        type (str): model type.
+        context (JobContext): job receiving the segments and the progress.
 
     Returns:
         str: joined str fron the transcribe speech.
@@ -43,18 +77,19 @@ def transcribe_model(file_path:str, type:str) -> str:
     model = load_model(type)
     segments, info = model.transcribe(file_path, beam_size=5, temperature=0.2)
 
-    st.write("Detected language '%s' with probability %f" % (info.language, info.language_probability))
+    message = "Transcribing audio, detected language '%s' with probability %f" % (info.language, info.language_probability)
 
     text = []
     for segment in segments:
-        st.write("[%.2fs -> %.2fs] %s" % (segment.start, segment.end, segment.text))
+        context.segment(segment.start, segment.end, segment.text)
+        context.progress(0.1 + 0.5 * min(segment.end / info.duration, 1.0) if info.duration else 0.1, message)
         text.append(segment.text)
     
     return ''.join(text)
 
 def summarize_text(text:str) -> str:
     """
-    summarize text from speech recognition's transcribe
+    summarize text from speech recognition's transcribe, memoized by transcript and settings
 
     Args:
         text (str): string from the speech recognition's transcribe.
@@ -62,24 +97,167 @@ def summarize_text(text:str) -> str:
     Returns:
         str: summarize text
     """
-    summarizer = pipeline(
-            "summarization",
-            model="google/pegasus-xsum",
-            tokenizer="google/pegasus-xsum",
-            use_fast=False
-        )
     max_length = len(text) // 5  # Use integer division to ensure max_length is an integer
     min_length = max_length // 4  # Use integer division to ensure min_length is an integer
 
+    key = cache_key(
+        text=text_hash(text),
+        model="google/pegasus-xsum",
+        max_length=max_length,
+        min_length=min_length,
+        do_sample=False
+    )
+    summary_text = summary_cache.get(key)
+    if summary_text is not None:
+        return summary_text
+
+    summarizer = load_summarizer()
     summary = summarizer(text, max_length=max_length, min_length=min_length, do_sample=False)
     summary_text = summary[0]['summary_text'] 
 
     # summary_text = re.sub(r'([.!?])', r'\1\n', summary_text)
+    summary_cache.put(key, summary_text)
     return summary_text
 
-test = 0
+def audio_path(job_id:str) -> str:
+    """
+    Downloaded audio of a job, every job has its own folder so concurrent jobs never overwrite each other's audio.
+    """
+    return os.path.join(AUDIO_FOLDER, job_id, "audio.wav")
+
+def remove_expired_audio():
+    """
+    Delete the audio of the jobs the queue has purged. The audio of a finished job is kept
+    as long as the job itself, so its page can still play it.
+    """
+    if not os.path.isdir(AUDIO_FOLDER):
+        return
+    for job_id in os.listdir(AUDIO_FOLDER):
+        job_folder = os.path.join(AUDIO_FOLDER, job_id)
+        if os.path.isdir(job_folder) and job_queue.get(job_id) is None:
+            shutil.rmtree(job_folder, ignore_errors=True)
+            print(f"The folder {job_folder} has been deleted.")
+
+def run_job(context, url:str, model_type:str) -> dict:
+    """
+    Download, transcribe, summarize and evaluate a YouTube video in a job worker.
+
+    Args:
+        context (JobContext): job receiving the segments and the progress.
+        url (str): YouTube video URL.
+        model_type (str): Whisper model type.
+
+    Returns:
+        dict: transcription, summary and evaluation of the video.
+    """
+    remove_expired_audio()
+
+    audio_file_path = audio_path(context.job_id)
+    job_folder = os.path.dirname(audio_file_path)
+    try:
+        context.progress(0.0, "Downloading audio...")
+        download_youtube_video_as_mp3(url, os.path.join(job_folder, "audio"))
+        if not os.path.exists(audio_file_path):
+            raise ValueError("unable to download video data")
+
+        context.progress(0.1, "Transcribing audio...")
+        recognized_text = transcribe_model(audio_file_path, model_type, context)
+
+        context.progress(0.6, "summarize...")
+        summary = summarize_text(recognized_text)
+
+        context.progress(0.9, "Evaluating summary...")
+        evaluation = format_eval(rouge_eval(summary, recognized_text))
+    except BaseException:
+        # A failed job has nothing to play back
+        shutil.rmtree(job_folder, ignore_errors=True)
+        print(f"The folder {job_folder} has been deleted.")
+        raise
+
+    return {"transcription": recognized_text, "summary": summary, "evaluation": evaluation}
+
+job_queue.register("extraction", run_job)
+
+def show_job(job_id:str):
+    """
+    Display the progress, partial transcription and results of a job, refreshing until it finishes.
+
+    The page polls inside this script run instead of rerunning it, so segments already on
+    screen stay there and every poll only appends the new ones. The segments read so far are
+    kept in the session, a rerun redraws them without reading them again.
+
+    Args:
+        job_id (str): id returned by the job queue.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        st.error("This job no longer exists, please generate the extraction again.", icon="🚨")
+        return
+
+    if st.session_state.get("segments_job") != job_id:
+        st.session_state["segments_job"] = job_id
+        st.session_state["segments"] = []
+    segments = st.session_state["segments"]
+
+    st.video(job["payload"]["url"])
+    audio = st.empty()
+    status = st.empty()
+    progress = st.empty()
+    for start, end, text in segments:
+        st.write("[%.2fs -> %.2fs] %s" % (start, end, text))
+    segment_container = st.container()
+
+    audio_shown = False
+    while True:
+        if job["status"] == "queued" and segments:
+            # The job was requeued after its worker stopped, it starts over
+            segments.clear()
+            st.rerun()
+
+        # The audio is playable as soon as the download finishes
+        if not audio_shown and os.path.exists(audio_path(job_id)):
+            audio.audio(audio_path(job_id), format="audio/wav")
+            audio_shown = True
+
+        if job["status"] == "queued":
+            status.info(f"⏳ Waiting in the queue, {job['position']} jobs ahead.")
+        else:
+            status.empty()
+        progress.progress(job["progress"], text=job["message"] or "Operation in progress. Please wait.")
+
+        for start, end, text in job_queue.segments(job_id, len(segments)):
+            segment_container.write("[%.2fs -> %.2fs] %s" % (start, end, text))
+            segments.append((start, end, text))
+
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(1)
+
+        job = job_queue.get(job_id)
+        if job is None:
+            st.error("This job no longer exists, please generate the extraction again.", icon="🚨")
+            return
+
+    if job["status"] == "done":
+        st.text_area("Recognized Text:", job["result"]["transcription"], height=200)
+        st.text_area("Summary:", job["result"]["summary"], height=200)
+        st.text_area("Evaluation Result:", job["result"]["evaluation"], height=100)
+    else:
+        st.error(f"An error occured: {job['error']}", icon="🚨")
+
+def start_prewarm():
+    """
+    Load the default Whisper model and the summarizer in the background while the page renders.
+    """
+    loaders = {
+        f"whisper-{model_type}": (lambda model_type=model_type: load_model(model_type))
+        for model_type in prewarm.configured_models([MODEL_TYPES[0]])
+    }
+    loaders["summarizer"] = load_summarizer
+    prewarm.prewarm(loaders)
 
 def main():
+    start_prewarm()
 
     hide_decoration_bar_style = '''<style>header {visibility: hidden;}</style>'''
     st.markdown(hide_decoration_bar_style, unsafe_allow_html=True)
@@ -97,54 +275,28 @@ def main():
 
     with st.expander("Criterias", expanded=False):
 
-        model = st.selectbox("Choose model type", ["large","medium", "medium.en", "small", "small.en", "base", "base.en", "tiny.en", "tiny"])
+        model = st.selectbox("Choose model type", MODEL_TYPES)
         url = st.text_input("Enter the YouTube video URL")
 
-        download_path = "audio_temp/audio"
+        if not prewarm.is_ready():
+            st.caption("⏳ Models are still loading in the background, the first extraction may take longer.")
+        metrics = job_queue.metrics()
+        st.caption(f"🧾 {metrics['queued']} extractions waiting, {metrics['running']} running")
         try:
             if st.button('Generate Extraction', icon="🚀", type="primary"):
-                with st.spinner():
-                    if 'https://youtu.be/' in url:
-                        test = download_youtube_video_as_mp3(url, download_path)
-                    else:
-                        raise ValueError("String must input url")
-
-                    st.video(url) 
-
-                    # Check if the file was downloaded and exists
-                    if os.path.exists("audio_temp/audio.wav"):
-                        st.audio("audio_temp/audio.wav", format="audio/wav")
-
-                        audio_file_path = "audio_temp/audio.wav"
-
-                        progress_text = "Operation in progress. Please wait."
-                        my_bar = st.progress(0, text=progress_text)
+                if 'https://youtu.be/' not in url:
+                    raise ValueError("String must input url")
 
-                        my_bar.progress(10, text="Transcribing audio...")
-                        recognized_text = transcribe_model(audio_file_path, model)
-
-                        st.text_area("Recognized Text:", recognized_text, height=200)
-
-                        my_bar.progress(60, text="summarize...")
-                        summary = summarize_text(recognized_text)
-
-                        my_bar.progress(80, text="Summarization result...")
-                        st.text_area("Summary:", summary, height=200)
-
-                        my_bar.progress(100, text="Operation complete...")
-                        eval = rouge_eval(summary, recognized_text)
-                        st.text_area("Evaluation Result:", eval, height=100)
-                    else:
-                        raise ValueError("unable to download video data")
-
-                    if os.path.exists(audio_file_path):
-                        os.remove(audio_file_path)
-                        print(f"The file {audio_file_path} has been deleted.")
-                    else:
-                        print(f"The file {audio_file_path} does not exist.")
+                # The job id lives in this browser session, other sessions have their own
+                st.session_state["job_id"] = job_queue.submit("extraction", url=url, model_type=model)
 
+        except QueueFull as e:
+                st.error(f"The server is busy: {e}", icon="🚨")
         except Exception as e:
                 st.error(f"An error occured: {e}", icon="🚨")           
 
+    if "job_id" in st.session_state:
+        show_job(st.session_state["job_id"])
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,85 @@
+from speech_common.tokenizer import CachedTokenizer
+
+from collections import Counter, defaultdict
+from typing import Dict, List, Sequence, Tuple
+import math
+
+
+def ngrams(tokens: Sequence[str], orders: Sequence[int]) -> set:
+    """
+    Distinct n-grams of a token list, for every order in `orders`.
+    """
+    return {tuple(tokens[i:i + n]) for n in orders for i in range(len(tokens) - n + 1)}
+
+
+class SentenceIndex:
+    def __init__(
+            self,
+            sentences: List[List[str]],
+            orders: Sequence[int] = (1, 2),
+            max_postings: int = 200
+    ):
+        """
+        Inverted index from n-grams to the source sentences containing them.
+
+        A summary sentence is only compared with the sentences sharing one of its n-grams,
+        so aligning a summary costs about its own length instead of summary x source pairs.
+        N-grams found in more than `max_postings` sentences ("the", "and", ...) carry almost
+        no evidence and are skipped at lookup to keep it short.
+
+        Args:
+            sentences (list): Tokenized source sentences.
+            orders (Sequence[int]): N-gram orders to index.
+            max_postings (int): Largest number of sentences an n-gram may occur in to count as evidence.
+        """
+        self.orders = orders
+        self.size = len(sentences)
+        self.max_postings = max(max_postings, 1)
+        self.postings: Dict[tuple, List[int]] = defaultdict(list)
+        for sentence_id, tokens in enumerate(sentences):
+            for gram in ngrams(tokens, orders):
+                self.postings[gram].append(sentence_id)
+
+    def candidates(self, tokens: List[str], top_k: int = 2) -> List[int]:
+        """
+        Source sentences sharing the most weighted n-grams with a sentence.
+
+        Args:
+            tokens (list): Tokenized summary sentence.
+            top_k (int): Number of sentences to return.
+
+        Returns:
+            list: Up to `top_k` sentence ids, in source order.
+        """
+        votes: Counter = Counter()
+        for gram in ngrams(tokens, self.orders):
+            ids = self.postings.get(gram, ())
+            if not ids or len(ids) > self.max_postings:
+                continue
+            # Rare n-grams and longer n-grams are stronger evidence of support
+            weight = len(gram) * math.log(1 + self.size / len(ids))
+            for sentence_id in ids:
+                votes[sentence_id] += weight
+        return sorted(sentence_id for sentence_id, _ in votes.most_common(top_k))
+
+
+def align_sentences(
+        summary: List[str],
+        source: List[str],
+        tokenizer: CachedTokenizer,
+        top_k: int = 2
+) -> List[Tuple[str, List[int]]]:
+    """
+    Match every summary sentence with the source sentences that best support it.
+
+    Args:
+        summary (list): Summary sentences.
+        source (list): Source sentences, the transcript.
+        tokenizer (CachedTokenizer): Tokenizer shared with the scorer.
+        top_k (int): Maximum supporting sentences per summary sentence.
+
+    Returns:
+        list: (summary sentence, supporting sentence ids) pairs, ids empty when nothing matches.
+    """
+    index = SentenceIndex([tokenizer.tokenize(sentence) for sentence in source])
+    return [(sentence, index.candidates(tokenizer.tokenize(sentence), top_k)) for sentence in summary]
@@ -0,0 +1,36 @@
+import numpy as np
+
+_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def segment_samples(audio) -> np.ndarray:
+    """
+    View the raw PCM data of a pydub AudioSegment as integer samples, without copying.
+
+    Args:
+        audio (AudioSegment): Audio to view.
+
+    Returns:
+        np.ndarray: Read-only array of shape (frames,) for mono or (frames, channels).
+    """
+    samples = np.frombuffer(audio.raw_data, dtype=_DTYPES[audio.sample_width])
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels)
+    return samples
+
+
+def mono_int16(audio):
+    """
+    Convert a pydub AudioSegment to mono 16-bit PCM, only when it is not already.
+
+    Args:
+        audio (AudioSegment): Audio to convert.
+
+    Returns:
+        AudioSegment: Mono, 16-bit audio at the original frame rate.
+    """
+    if audio.channels != 1:
+        audio = audio.set_channels(1)
+    if audio.sample_width != 2:
+        audio = audio.set_sample_width(2)
+    return audio
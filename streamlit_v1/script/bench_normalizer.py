@@ -0,0 +1,128 @@
+import random
+import time
+import re
+
+from script.normalizer import normalize, StreamingNormalizer
+
+# Equivalence cases that exercise every step of the original clean_text
+CASES = [
+    "",
+    "   ",
+    "hello world",
+    "<s> hello world </s>",
+    "hello , world . how are you ?",
+    "the u.s economy grew 3,5 percent",
+    "a.b.c.d and 1,000,000",
+    "wait..what,,really,.yes.,no",
+    "what ! really ?",
+    "first sentence.second sentence!third?",
+    "ALL CAPS SENTENCE. another One",
+    "multiple   spaces\tand\nnewlines",
+    "trailing punctuation .",
+    "<pad><pad>inflation rose. <unk> rates followed",
+    "unclosed < tag. and > stray",
+    "but and and but. but",
+    "élan vital. ßtraße test",
+]
+
+# Alphabet for the randomized equivalence run
+ALPHABET = list("abcXYZ é1ßΣİ") + [" ", "  ", "\n", "\t", "\xa0", "\x1c", ".", ",", "!", "?", "..", ",.", "<s>", "</s>", "<", ">", "and", "but"]
+
+
+def clean_text(text):
+    """
+    The original google_recog.clean_text, kept verbatim as the reference implementation.
+    """
+    # Remove special tokens like <s> and </s>
+    text = re.sub(r'<.*?>', '', text)
+
+    # Remove extra spaces around punctuation marks
+    text = re.sub(r'\s+([?.!,])', r'\1', text)
+
+    # Fix misplaced periods within words
+    text = re.sub(r'\b(\w+)\.(\w+)\b', r'\1\2', text)
+    text = re.sub(r'\b(\w+),(\w+)\b', r'\1\2', text)
+
+    # Replace multiple spaces with a single space
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    # Ensure proper spacing after periods, commas, etc.
+    text = re.sub(r'([?.!,])([^\s])', r'\1 \2', text)
+
+    # Correct common punctuation issues
+    text = text.replace('..', '.').replace(',,', ',')
+    text = text.replace(',.', ',').replace('.,', '.')
+    text = text.replace(' !', '!').replace(' ?', '?')
+
+    # Capitalize the first letter of each sentence
+    sentences = re.split(r'([.!?]\s*)', text)
+    sentences = [s.capitalize() if i % 2 == 0 else s for i, s in enumerate(sentences)]
+    text = ''.join(sentences)
+
+    # Handle specific conjunction-like structures
+    text = re.sub(r'\band\b', 'and', text)
+    text = re.sub(r'\bbut\b', 'but', text)
+
+    # Final correction for double spaces and edge cases
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    return text
+
+
+def stream(text: str, segments: int, rng: random.Random) -> str:
+    """
+    Normalize `text` through StreamingNormalizer, fed in random segments.
+    """
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, segments)))
+    normalizer = StreamingNormalizer()
+    parts = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+    return "".join(normalizer.feed(part) for part in parts) + normalizer.flush()
+
+
+def check_equivalence(random_cases: int = 50000, seed: int = 0) -> None:
+    """
+    Compare normalize and StreamingNormalizer with the original clean_text.
+    """
+    rng = random.Random(seed)
+    cases = CASES + [
+        "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 40)))
+        for _ in range(random_cases)
+    ]
+
+    for text in cases:
+        expected = clean_text(text)
+        assert normalize(text) == expected, f"normalize mismatch for {text!r}"
+        assert stream(text, rng.randint(0, 6), rng) == expected, f"streaming mismatch for {text!r}"
+
+    print(f"✅ {len(cases)} cases identical to clean_text (batch and streaming)")
+
+
+def benchmark(num_transcripts: int = 2000, repeat: int = 3, seed: int = 0) -> None:
+    """
+    Time clean_text against normalize on synthetic punctuated transcripts.
+    """
+    rng = random.Random(seed)
+    words = ["the", "market", "rate", "inflation", "u.s", "3,5", "percent", "and", "but", "demand", "supply"]
+    punctuation = ["", "", "", " ,", ".", " .", "?", "!", ",,", ".."]
+    transcripts = [
+        "<s> " + " ".join(rng.choice(words) + rng.choice(punctuation) for _ in range(rng.randint(200, 600))) + " </s>"
+        for _ in range(num_transcripts)
+    ]
+
+    for name, fn in (("clean_text", clean_text), ("normalize", normalize)):
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for transcript in transcripts:
+                fn(transcript)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:<12} {best:.3f}s for {num_transcripts} transcripts ({num_transcripts / best:.0f} transcripts/s)")
+
+
+def main():
+    check_equivalence()
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
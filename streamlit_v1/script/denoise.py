@@ -0,0 +1,160 @@
+from speech_common.log import logger
+
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import time
+import os
+
+import numpy as np
+
+
+def _denoise_block(index: int, block: np.ndarray, rate: int) -> tuple:
+    import noisereduce as nr
+
+    return index, nr.reduce_noise(y=block, sr=rate).astype(np.float32, copy=False)
+
+
+def block_ranges(num_samples: int, block_samples: int, overlap_samples: int) -> list:
+    """
+    Split a signal into overlapping blocks.
+
+    Args:
+        num_samples (int): Length of the signal.
+        block_samples (int): Length of a block.
+        overlap_samples (int): Samples shared by consecutive blocks.
+
+    Returns:
+        list: (start, end) sample ranges, end exclusive.
+    """
+    step = block_samples - overlap_samples
+    ranges = []
+    start = 0
+    while True:
+        end = min(start + block_samples, num_samples)
+        ranges.append((start, end))
+        if end >= num_samples:
+            return ranges
+        start += step
+
+
+def _add_block(output: np.ndarray, block: np.ndarray, start: int, fade_in: int, fade_out: int) -> None:
+    # Linear crossfade, the two ramps of an overlap always sum to one
+    if fade_in:
+        block[:fade_in] *= np.linspace(0.0, 1.0, fade_in + 2, dtype=np.float32)[1:-1]
+    if fade_out:
+        block[-fade_out:] *= np.linspace(1.0, 0.0, fade_out + 2, dtype=np.float32)[1:-1]
+    output[start:start + len(block)] += block
+
+
+def denoise(
+        samples: np.ndarray,
+        rate: int,
+        block_seconds: float = 30.0,
+        overlap_seconds: float = 1.0,
+        workers: int = None
+        ) -> np.ndarray:
+    """
+    Reduce noise on a mono signal in overlapping blocks spread over worker processes.
+
+    Only `2 * workers` blocks are in flight at any time and each result is crossfaded into a
+    single float32 output buffer, so memory stays at the input, the output and a few blocks
+    whatever the length of the recording.
+
+    Args:
+        samples (np.ndarray): Mono samples.
+        rate (int): Sample rate.
+        block_seconds (float): Length of a block.
+        overlap_seconds (float): Audio shared by consecutive blocks, crossfaded in the output.
+        workers (int): Number of worker processes, defaults to the number of cores.
+
+    Returns:
+        np.ndarray: Denoised float32 samples, in the scale of the input.
+    """
+    block_samples = int(block_seconds * rate)
+    overlap_samples = min(int(overlap_seconds * rate), block_samples // 2)
+    ranges = block_ranges(len(samples), block_samples, overlap_samples)
+
+    # A single block is not worth a process pool
+    if len(ranges) == 1:
+        return _denoise_block(0, samples, rate)[1]
+
+    output = np.zeros(len(samples), dtype=np.float32)
+    last = len(ranges) - 1
+
+    def merge(future):
+        index, block = future.result()
+        start, _ = ranges[index]
+        _add_block(
+            output, block, start,
+            fade_in=overlap_samples if index > 0 else 0,
+            fade_out=overlap_samples if index < last else 0
+        )
+
+    workers = workers or os.cpu_count() or 1
+    start_time = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        for index, (start, end) in enumerate(ranges):
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge(future)
+            pending.add(pool.submit(_denoise_block, index, samples[start:end], rate))
+
+        for future in wait(pending).done:
+            merge(future)
+
+    logger.info(f"Denoised {len(samples) / rate:.0f}s of audio in {len(ranges)} blocks in {time.perf_counter() - start_time:.1f}s")
+    return output
+
+
+def normalize_peak(samples: np.ndarray, peak: float = 1.0) -> np.ndarray:
+    """
+    Scale a float signal in place so its largest absolute sample equals `peak`.
+
+    Args:
+        samples (np.ndarray): Float samples, modified in place.
+        peak (float): Target peak, 1.0 is full scale.
+
+    Returns:
+        np.ndarray: The same array.
+    """
+    current = float(np.max(np.abs(samples))) if len(samples) else 0.0
+    if current > 0:
+        samples *= peak / current
+    return samples
+
+
+def normalize_loudness(samples: np.ndarray, target_dbfs: float = -20.0, peak: float = 1.0) -> np.ndarray:
+    """
+    Scale a float signal in place to an RMS level, without letting its peak exceed `peak`.
+
+    Args:
+        samples (np.ndarray): Float samples in full scale units, modified in place.
+        target_dbfs (float): Target RMS level in dBFS.
+        peak (float): Highest allowed absolute sample after scaling.
+
+    Returns:
+        np.ndarray: The same array.
+    """
+    if not len(samples):
+        return samples
+    rms = float(np.sqrt(np.dot(samples, samples) / len(samples)))
+    current_peak = float(np.max(np.abs(samples)))
+    if rms > 0:
+        samples *= min(10 ** (target_dbfs / 20) / rms, peak / current_peak)
+    return samples
+
+
+def to_int16(samples: np.ndarray) -> np.ndarray:
+    """
+    Convert float samples in [-1, 1] to 16-bit PCM.
+
+    Args:
+        samples (np.ndarray): Float samples, scaled in place.
+
+    Returns:
+        np.ndarray: int16 samples.
+    """
+    samples *= 32767
+    np.clip(samples, -32768, 32767, out=samples)
+    return samples.astype(np.int16)
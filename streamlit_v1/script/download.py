@@ -1,4 +1,3 @@
-import yt_dlp
 import os
 
 def download_youtube_video_as_mp3(youtube_url, output_path):
@@ -12,6 +11,8 @@ def download_youtube_video_as_mp3(youtube_url, output_path):
     Returns:
         Audio: Audio from youtube's video.
     """
+    import yt_dlp
+
     try:
         ydl_opts = {
             'format': 'bestaudio/best',
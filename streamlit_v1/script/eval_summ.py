@@ -1,21 +1,97 @@
-import nltk
-from rouge_score import rouge_scorer, scoring
-from nltk.tokenize import sent_tokenize, word_tokenize
+# nltk and rouge_score are imported on first use, they are slow to import and not needed to render the app.
 
-nltk.download('punkt_tab')
+def ensure_punkt():
+    """
+    Download the punkt tokenizer on first use only, instead of on every import.
+    """
+    import nltk
 
-def rouge_eval(summary, original_text):
+    try:
+        nltk.data.find('tokenizers/punkt_tab')
+    except LookupError:
+        nltk.download('punkt_tab')
+
+def rouge_eval(summary, original_text, mode="aligned", top_k=2, support_threshold=0.5):
+    """
+    ROUGE of a summary against the transcript it was made from, sentence by sentence.
+
+    In "aligned" mode every summary sentence is scored against the transcript sentences that
+    best support it, found through an n-gram inverted index of the transcript. The grounding
+    score is the ROUGE-1 precision of those pairs: the share of summary words backed by the
+    transcript. "positional" mode pairs sentence i with sentence i, as before.
+
+    Args:
+        summary (str): Generated summary.
+        original_text (str): Transcript the summary was made from.
+        mode (str): "aligned" or "positional".
+        top_k (int): Maximum transcript sentences supporting one summary sentence.
+        support_threshold (float): ROUGE-1 precision from which a summary sentence counts as supported.
+
+    Returns:
+        dict: rouge1 and rougeL AggregateScores, grounding AggregateScore of ROUGE-1 precision,
+        number of supported summary sentences, total summary sentences and a message explaining
+        all-zero scores when the summary or the transcript is empty (None otherwise).
+    """
+    from nltk.tokenize import sent_tokenize
+    from rouge_score import rouge_scorer, scoring
+    from speech_common.aggregation import aggregate_rouge
+    from script.alignment import align_sentences
+    from speech_common.tokenizer import CachedTokenizer
+
+    ensure_punkt()
 
     original_text = sent_tokenize(original_text)
     summary = sent_tokenize(summary)
 
-    scorer = rouge_scorer.RougeScorer(['rouge1', 'rougeL'], use_stemmer=True)
-    aggregator = scoring.BootstrapAggregator()
+    rouge_types = ['rouge1', 'rougeL']
+    tokenizer = CachedTokenizer(use_stemmer=True)
+    scorer = rouge_scorer.RougeScorer(rouge_types, tokenizer=tokenizer)
+
+    if mode == "aligned":
+        pairs = [
+            (" ".join(original_text[i] for i in support), sentence)
+            for sentence, support in align_sentences(summary, original_text, tokenizer, top_k)
+        ]
+    elif mode == "positional":
+        pairs = list(zip(original_text, summary))
+    else:
+        raise ValueError(f"Unknown alignment mode: {mode}")
+
+    # One row of precision, recall and fmeasure per type and sentence, bootstrapped at once
+    scores = []
+    for reference, summary_sentence in pairs:
+        result = scorer.score(reference, summary_sentence)
+        scores.append([value for rouge_type in rouge_types for value in result[rouge_type]])
+
+    if scores:
+        result = aggregate_rouge(scores, rouge_types)
+        message = None
+    else:
+        # Bootstrapping no rows gives NaN everywhere, an empty summary or transcript scores zero
+        zero = scoring.AggregateScore(*[scoring.Score(0.0, 0.0, 0.0)] * 3)
+        result = {rouge_type: zero for rouge_type in rouge_types}
+        message = "Empty summary, nothing to evaluate" if not summary else "Empty transcript, nothing to compare with"
+    result["grounding"] = result["rouge1"]
+    result["supported"] = sum(1 for row in scores if row[0] >= support_threshold)
+    result["sentences"] = len(summary)
+    result["message"] = message
 
-    for i, summary_sentence in enumerate(summary):
-        scores = scorer.score(original_text[i], summary_sentence)
-        aggregator.add_scores(scores)
+    return result
 
-    result = aggregator.aggregate()
+def format_eval(result):
+    """
+    Render the output of `rouge_eval` for the "Evaluation Result" box.
+    """
+    if result["message"]:
+        return result["message"]
 
-    return result['rougeL'].mid
\ No newline at end of file
+    grounding = result["grounding"]
+    lines = [
+        f"Grounding: {grounding.mid.precision:.3f} "
+        f"(95% CI {grounding.low.precision:.3f}-{grounding.high.precision:.3f}), "
+        f"{result['supported']}/{result['sentences']} summary sentences supported by the transcript",
+    ]
+    for rouge_type in ('rouge1', 'rougeL'):
+        mid = result[rouge_type].mid
+        lines.append(f"{rouge_type}: precision {mid.precision:.3f}, recall {mid.recall:.3f}, F1 {mid.fmeasure:.3f}")
+    return "\n".join(lines)
@@ -0,0 +1,108 @@
+import re
+
+_TAGS = re.compile(r'<.*?>')
+_PERIOD_IN_WORD = re.compile(r'\b(\w+)\.(\w+)\b')
+_COMMA_IN_WORD = re.compile(r'\b(\w+),(\w+)\b')
+_SPACE_AFTER_PUNCT = re.compile(r'([?.!,])([^\s])')
+_SENTENCE_SPLIT = re.compile(r'([.!?]\s*)')
+
+# A sentence end followed by whitespace and a plain character: normalizing the text on
+# either side of the whitespace independently gives the same result as normalizing it whole.
+_SAFE_CUT = re.compile(r'[.!?]\s+(?=[^\s?.!,<])')
+
+
+def normalize(text: str) -> str:
+    """
+    Clean a punctuated transcript with a fixed set of precompiled passes.
+
+    Produces the same output as the original `clean_text` regex chain: special tokens are
+    removed, spacing around punctuation is fixed, periods and commas inside words are
+    dropped and every sentence is capitalized.
+
+    Args:
+        text (str): Punctuated transcript.
+
+    Returns:
+        str: Cleaned transcript.
+    """
+    # Remove special tokens like <s> and </s>
+    if '<' in text:
+        text = _TAGS.sub('', text)
+
+    # Collapse whitespace first, so only single spaces can precede punctuation. str.split uses
+    # the same whitespace definition as \s and is much faster than a regex substitution.
+    text = ' '.join(text.split())
+    text = text.replace(' ?', '?').replace(' .', '.').replace(' !', '!').replace(' ,', ',')
+
+    # Fix misplaced periods and commas within words
+    if '.' in text:
+        text = _PERIOD_IN_WORD.sub(r'\1\2', text)
+    if ',' in text:
+        text = _COMMA_IN_WORD.sub(r'\1\2', text)
+
+    # Ensure proper spacing after periods, commas, etc. and correct doubled punctuation
+    text = _SPACE_AFTER_PUNCT.sub(r'\1 \2', text)
+    text = text.replace('..', '.').replace(',,', ',')
+    text = text.replace(',.', ',').replace('.,', '.')
+    text = text.replace(' !', '!').replace(' ?', '?')
+
+    # Capitalize the first letter of each sentence
+    sentences = _SENTENCE_SPLIT.split(text)
+    sentences[::2] = [sentence.capitalize() for sentence in sentences[::2]]
+    return ''.join(sentences)
+
+
+class StreamingNormalizer:
+    def __init__(self):
+        """
+        Incremental version of `normalize` for streaming transcription loops.
+
+        Segments are buffered until a sentence boundary is reached, then the finished
+        sentences are normalized and returned. Joining every `feed` result and the final
+        `flush` gives exactly `normalize` of the whole transcript.
+        """
+        self._buffer = ""
+        self._emitted = False
+
+    def _emit(self, normalized: str) -> str:
+        if not normalized:
+            return ""
+        separator = " " if self._emitted else ""
+        self._emitted = True
+        return separator + normalized
+
+    def feed(self, segment: str) -> str:
+        """
+        Add a transcribed segment.
+
+        Args:
+            segment (str): Raw text of the next segment.
+
+        Returns:
+            str: Newly finished, normalized text. Empty while the current sentence is still open.
+        """
+        self._buffer += segment
+
+        for match in reversed(list(_SAFE_CUT.finditer(self._buffer))):
+            head = self._buffer[:match.start() + 1]
+            # An unclosed "<" could still become a special token spanning the cut
+            if head.rfind('<') > head.rfind('>'):
+                continue
+
+            # The cut only holds if the head still ends a sentence once cleaned, e.g. ",." collapses to ","
+            normalized = normalize(head)
+            if normalized[-1:] in ('.', '!', '?'):
+                self._buffer = self._buffer[match.end():]
+                return self._emit(normalized)
+
+        return ""
+
+    def flush(self) -> str:
+        """
+        Normalize whatever is still buffered at the end of the stream.
+
+        Returns:
+            str: Remaining normalized text.
+        """
+        text, self._buffer = self._buffer, ""
+        return self._emit(normalize(text))
@@ -0,0 +1,163 @@
+from speech_common.log import logger
+from speech_common.registry import registry
+
+from typing import List
+import time
+
+PUNCTUATION_MODEL = "oliverguhr/fullstop-punctuation-multilang-large"
+
+
+def load_punctuation_model(model_name: str = PUNCTUATION_MODEL):
+    """
+    Load the punctuation tokenizer and token classification model, once per process.
+
+    Args:
+        model_name (str): HuggingFace model name.
+
+    Returns:
+        tuple: (tokenizer, model) shared through the model registry.
+    """
+    def loader():
+        from transformers import AutoTokenizer, AutoModelForTokenClassification
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForTokenClassification.from_pretrained(model_name)
+        model.eval()
+        return tokenizer, model
+
+    return registry.get("transformers", model_name, loader)
+
+
+def word_windows(token_counts: List[int], max_tokens: int, overlap_words: int) -> List[tuple]:
+    """
+    Split a document into overlapping windows of whole words under a token budget.
+
+    Args:
+        token_counts (List[int]): Number of sub-tokens of every word.
+        max_tokens (int): Token budget of a window, without special tokens.
+        overlap_words (int): Words shared by consecutive windows.
+
+    Returns:
+        List[tuple]: (start, end) word ranges, end exclusive.
+    """
+    windows = []
+    start = 0
+    while start < len(token_counts):
+        end, total = start, 0
+        while end < len(token_counts) and (end == start or total + token_counts[end] <= max_tokens):
+            total += token_counts[end]
+            end += 1
+        windows.append((start, end))
+
+        if end >= len(token_counts):
+            break
+        start = max(start + 1, end - overlap_words)
+
+    return windows
+
+
+def punctuate_texts(
+        texts: List[str],
+        max_tokens: int = 256,
+        overlap_words: int = 40,
+        batch_size: int = 16,
+        model_name: str = PUNCTUATION_MODEL
+        ) -> List[str]:
+    """
+    Restore punctuation on several documents of any length.
+
+    Every document is split into overlapping word windows. The windows of all documents go
+    through the model together in padded batches, and each word keeps the prediction of the
+    window in which it sits furthest from the edges (center-window voting).
+
+    Args:
+        texts (List[str]): Unpunctuated documents.
+        max_tokens (int): Token budget of a window, must stay below the model's 512 positions.
+        overlap_words (int): Words shared by consecutive windows.
+        batch_size (int): Maximum number of windows per forward pass.
+        model_name (str): HuggingFace token classification model.
+
+    Returns:
+        List[str]: Punctuated documents in the same order as `texts`.
+    """
+    import torch
+
+    tokenizer, model = load_punctuation_model(model_name)
+    labels = {i: ("" if label == "0" else label) for i, label in model.config.id2label.items()}
+
+    documents = [text.split() for text in texts]
+    all_words = [word for words in documents for word in words]
+    if not all_words:
+        return ["" for _ in texts]
+
+    # Each word is tokenized on its own, which matches sentencepiece tokenization of space separated words
+    word_ids = tokenizer(all_words, add_special_tokens=False)["input_ids"]
+
+    windows = []  # (document, start, end)
+    offset = 0
+    for doc, words in enumerate(documents):
+        counts = [len(ids) for ids in word_ids[offset:offset + len(words)]]
+        windows.extend((doc, offset + s, offset + e) for s, e in word_windows(counts, max_tokens, overlap_words))
+        offset += len(words)
+
+    predictions = [""] * len(all_words)
+    best_distance = [-1] * len(all_words)
+
+    start_time = time.perf_counter()
+    for b in range(0, len(windows), batch_size):
+        batch = windows[b:b + batch_size]
+
+        sequences, first_tokens = [], []
+        for _, start, end in batch:
+            ids = [tokenizer.cls_token_id]
+            positions = []
+            for ids_of_word in word_ids[start:end]:
+                positions.append(len(ids))
+                ids.extend(ids_of_word)
+            ids.append(tokenizer.sep_token_id)
+            sequences.append(ids)
+            first_tokens.append(positions)
+
+        longest = max(len(ids) for ids in sequences)
+        input_ids = torch.full((len(sequences), longest), tokenizer.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), longest), dtype=torch.long)
+        for row, ids in enumerate(sequences):
+            input_ids[row, :len(ids)] = torch.tensor(ids)
+            attention_mask[row, :len(ids)] = 1
+
+        with torch.no_grad():
+            logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+        batch_labels = torch.argmax(logits, dim=2).tolist()
+
+        for (_, start, end), positions, row_labels in zip(batch, first_tokens, batch_labels):
+            for i, position in enumerate(positions):
+                distance = min(i, end - start - 1 - i)
+                word = start + i
+                if distance > best_distance[word]:
+                    best_distance[word] = distance
+                    predictions[word] = labels.get(row_labels[position], "")
+
+    logger.info(f"Punctuated {len(all_words)} words in {len(windows)} windows in {time.perf_counter() - start_time:.2f}s")
+
+    results = []
+    offset = 0
+    for words in documents:
+        results.append(" ".join(
+            word + predictions[offset + i] for i, word in enumerate(words)
+        ))
+        offset += len(words)
+    return results
+
+
+def punctuate(text: str, **kwargs) -> str:
+    """
+    Restore punctuation on a single document of any length.
+
+    Args:
+        text (str): Unpunctuated text.
+        **kwargs: Window and batch settings of `punctuate_texts`.
+
+    Returns:
+        str: Punctuated text.
+    """
+    return punctuate_texts([text], **kwargs)[0]
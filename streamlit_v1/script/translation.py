@@ -0,0 +1,103 @@
+from speech_common.log import logger
+from speech_common.registry import registry
+
+from typing import List, Optional
+import time
+
+MARIAN_MODEL = "Helsinki-NLP/opus-mt-{src_lang}-{tgt_lang}"
+
+
+def load_marian(src_lang: str, tgt_lang: str):
+    """
+    Load the Marian tokenizer and model for a language pair, once per process.
+
+    Args:
+        src_lang (str): The source language code (e.g., 'en' for English).
+        tgt_lang (str): The target language code (e.g., 'id' for Indonesian).
+
+    Returns:
+        tuple: (MarianTokenizer, MarianMTModel) shared through the model registry.
+    """
+    model_name = MARIAN_MODEL.format(src_lang=src_lang, tgt_lang=tgt_lang)
+
+    def loader():
+        from transformers import MarianMTModel, MarianTokenizer
+
+        tokenizer = MarianTokenizer.from_pretrained(model_name)
+        model = MarianMTModel.from_pretrained(model_name)
+        model.eval()
+        return tokenizer, model
+
+    return registry.get("marian", model_name, loader)
+
+
+def detect_language(text: str) -> str:
+    """
+    Detect the language of a whole document.
+
+    Args:
+        text (str): The document, or a representative sample of it.
+
+    Returns:
+        str: Language code reported by langdetect.
+    """
+    from langdetect import detect
+
+    return detect(text)
+
+
+def translate_lines(
+        lines: List[str],
+        tgt_lang: str,
+        src_lang: Optional[str] = None,
+        batch_size: int = 16,
+        max_length: int = 300,
+        **generate_kwargs
+        ) -> List[str]:
+    """
+    Translate many lines with one cached model in padded, length-sorted batches.
+
+    Args:
+        lines (List[str]): The lines to translate.
+        tgt_lang (str): The target language code (e.g., 'id' for Indonesian).
+        src_lang (Optional[str]): The source language code, e.g. the language Whisper detected.
+                                  Detected once over the whole document when omitted.
+        batch_size (int): Maximum number of lines per forward pass.
+        max_length (int): Maximum length of a translated line in tokens.
+        **generate_kwargs: Extra generation arguments, e.g. temperature, top_k or top_p.
+
+    Returns:
+        List[str]: Translated lines in the same order as `lines`. Empty lines stay empty.
+    """
+    import torch
+
+    translated = list(lines)
+    indices = [i for i, line in enumerate(lines) if line.strip()]
+    if not indices:
+        return translated
+
+    if src_lang is None:
+        src_lang = detect_language(" ".join(lines[i] for i in indices))
+    if src_lang == tgt_lang:
+        return translated
+
+    tokenizer, model = load_marian(src_lang, tgt_lang)
+
+    # Similar lengths in a batch keep padding small
+    indices.sort(key=lambda i: len(lines[i]))
+
+    start = time.perf_counter()
+    for b in range(0, len(indices), batch_size):
+        batch = indices[b:b + batch_size]
+        inputs = tokenizer([lines[i] for i in batch], return_tensors="pt", padding=True, truncation=True)
+
+        with torch.no_grad():
+            outputs = model.generate(**inputs, max_length=max_length, num_return_sequences=1, **generate_kwargs)
+
+        for i, text in zip(batch, tokenizer.batch_decode(outputs, skip_special_tokens=True)):
+            translated[i] = text
+
+    elapsed = time.perf_counter() - start
+    logger.info(f"Translated {len(indices)} sentences {src_lang}->{tgt_lang} in {elapsed:.2f}s "
+                f"({len(indices) / max(elapsed, 1e-9):.1f} sentences/s)")
+    return translated
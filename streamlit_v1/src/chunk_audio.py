@@ -1,7 +1,19 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+import subprocess
+import hashlib
+import json
+import wave
+import time
 import os
-from pydub import AudioSegment
 import re
 
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".m4a", ".ogg", ".opus", ".webm")
+MANIFEST_NAME = "manifest.json"
+
+# ffmpeg raw input formats by sample width, 8-bit WAV is unsigned
+PCM_FORMATS = {1: "u8", 2: "s16le", 3: "s24le", 4: "s32le"}
+
 def format_filename(input_string, chunk_number=0):
     # Remove leading and trailing whitespace
     input_string = input_string.strip()
@@ -15,49 +27,340 @@ def format_filename(input_string, chunk_number=0):
     formatted_string += f'_chunk_{chunk_number}'
     return formatted_string
 
-def chunk_audio(file_path, output_folder):
-    # Load the audio file
-    audio = AudioSegment.from_file(file_path)
+@contextmanager
+def open_pcm(file_path):
+    """
+    Open an audio file as a stream of interleaved PCM frames.
 
-    chunk_length_ms =  30000 # 1000 = 1s
-    audio_length_ms = len(audio)
+    WAV files are read directly, everything else (and WAV encodings the wave module
+    does not support) is decoded to 16-bit PCM through an ffmpeg pipe.
 
-    base_filename = format_filename(os.path.splitext(os.path.basename(file_path))[0])
+    Args:
+        file_path (str): Path to the audio file.
+
+    Yields:
+        tuple: ((channels, sample_width, frame_rate), read) where read(n) returns up to n frames as bytes.
+
+    Raises:
+        RuntimeError: When ffmpeg fails to decode the file.
+    """
+    if file_path.lower().endswith(".wav"):
+        try:
+            wav = wave.open(file_path, "rb")
+        except (wave.Error, EOFError):
+            wav = None
+        if wav is not None:
+            with wav:
+                yield (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()), wav.readframes
+            return
+
+    probe = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0",
+         "-show_entries", "stream=sample_rate,channels", "-of", "json", file_path],
+        capture_output=True, check=True, text=True
+    )
+    stream = json.loads(probe.stdout)["streams"][0]
+    channels, frame_rate = int(stream["channels"]), int(stream["sample_rate"])
+
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-v", "error", "-i", file_path, "-f", "s16le", "-acodec", "pcm_s16le", "-"],
+        stdout=subprocess.PIPE
+    )
+    frame_size = channels * 2
+    try:
+        yield (channels, 2, frame_rate), lambda frames: process.stdout.read(frames * frame_size)
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+
+    # A failed decode ends the stream early, its chunks must not be recorded as complete
+    if returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode {file_path} (exit code {returncode})")
+
+def write_wav(path, params, data):
+    channels, sample_width, frame_rate = params
+    with wave.open(path, "wb") as out:
+        out.setnchannels(channels)
+        out.setsampwidth(sample_width)
+        out.setframerate(frame_rate)
+        out.writeframes(data)
+
+def write_flac(path, params, data):
+    channels, sample_width, frame_rate = params
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-v", "error", "-y", "-f", PCM_FORMATS[sample_width],
+         "-ar", str(frame_rate), "-ac", str(channels), "-i", "-", "-c:a", "flac", path],
+        input=data, check=True
+    )
+
+CHUNK_WRITERS = {"wav": write_wav, "flac": write_flac}
+
+def chunk_audio(file_path, output_folder, chunk_length_ms=30000, overlap_ms=0, block_ms=1000, audio_format="wav"):
+    """
+    Split an audio file into fixed-length chunks, streaming it from disk.
 
-    # Calculate the number of chunks
-    num_chunks = audio_length_ms // chunk_length_ms
-    remainder_ms = audio_length_ms % chunk_length_ms
+    Frames are read block by block and every chunk is written as soon as it is complete,
+    so memory stays at about one chunk whatever the length of the input.
+
+    Args:
+        file_path (str): Path to the audio file.
+        output_folder (str): Folder the chunks are written to.
+        chunk_length_ms (int): Length of a chunk in milliseconds (1000 = 1s).
+        overlap_ms (int): Audio shared by consecutive chunks in milliseconds.
+        block_ms (int): Amount of audio read at a time in milliseconds.
+        audio_format (str): "wav", or "flac" for lossless compressed chunks.
+
+    Returns:
+        list: Paths of the written chunks, in order.
+    """
+    if not 0 <= overlap_ms < chunk_length_ms:
+        raise ValueError("overlap_ms must be at least 0 and shorter than chunk_length_ms")
+    if audio_format not in CHUNK_WRITERS:
+        raise ValueError(f"Unsupported chunk format: {audio_format}")
+    write_chunk = CHUNK_WRITERS[audio_format]
+
+    base_filename = format_filename(os.path.splitext(os.path.basename(file_path))[0])
 
     # Create output directory if it doesn't exist
     os.makedirs(output_folder, exist_ok=True)
 
-    # Create chunks
-    chunks = [audio[i * chunk_length_ms:(i + 1) * chunk_length_ms] for i in range(num_chunks)]
+    chunk_paths = []
+    with open_pcm(file_path) as (params, read):
+        channels, sample_width, frame_rate = params
+        frame_size = channels * sample_width
+        chunk_bytes = frame_rate * chunk_length_ms // 1000 * frame_size
+        step_bytes = chunk_bytes - frame_rate * overlap_ms // 1000 * frame_size
+        block_frames = max(1, frame_rate * block_ms // 1000)
+
+        def export(data):
+            path = os.path.join(output_folder, f"{base_filename}_chunk_{len(chunk_paths)}.{audio_format}")
+            write_chunk(path, params, data)
+            chunk_paths.append(path)
+
+        buffer = bytearray()
+        pending = False  # Buffer holds audio not yet written to any chunk
+        while True:
+            block = read(block_frames)
+            if not block:
+                break
+            buffer += block
+            pending = True
+
+            # Export every complete chunk, keeping only the overlap for the next one
+            while len(buffer) >= chunk_bytes:
+                export(bytes(buffer[:chunk_bytes]))
+                del buffer[:step_bytes]
+                pending = len(buffer) > chunk_bytes - step_bytes
+
+        # Remainder shorter than a chunk
+        usable = len(buffer) - len(buffer) % frame_size
+        if pending and usable > 0:
+            export(bytes(buffer[:usable]))
+
+    return chunk_paths
+
+def file_hash(file_path, block_size=1 << 20):
+    """
+    SHA-256 of a file's content, read in blocks.
+
+    Args:
+        file_path (str): Path to the file.
+        block_size (int): Bytes read at a time.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-    # Export chunks to the new folder
-    for i, chunk in enumerate(chunks):
-        chunk.export(os.path.join(output_folder, f"{base_filename}_chunk_{i}.wav"), format="wav")
-        
-    if remainder_ms > 0:
-        remainder_chunk = audio[num_chunks * chunk_length_ms:]
-        remainder_chunk.export(os.path.join(output_folder, f"{base_filename}_chunk_{num_chunks}.wav"), format="wav")
+def load_manifest(output_folder):
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as file:
+        return json.load(file)
 
-def process_all_audios(input_folder, output_folder):
+def save_manifest(output_folder, manifest):
+    # Written to a temporary file first, an interrupted run never leaves a truncated manifest
+    path = os.path.join(output_folder, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+def chunk_source(file_path, audio_output_folder, settings, known_hash=None):
+    """
+    Hash a source file and chunk it, unless its content matches `known_hash`.
+
+    Args:
+        file_path (str): Path to the audio file.
+        audio_output_folder (str): Folder for this file's chunks.
+        settings (dict): chunk_length_ms, overlap_ms and audio_format.
+        known_hash (str): Hash recorded by a previous run, if any.
+
+    Returns:
+        tuple: (hash, chunk paths), chunk paths is None when the content did not change.
+    """
+    digest = file_hash(file_path)
+    if digest == known_hash:
+        return digest, None
+    return digest, chunk_audio(file_path, audio_output_folder, **settings)
+
+def chunks_exist(entry, output_folder):
+    # A file whose chunks were deleted must be chunked again, even if its content did not change
+    return all(os.path.exists(os.path.join(output_folder, chunk)) for chunk in entry["chunks"])
+
+def is_up_to_date(entry, stat, settings, output_folder):
+    # Size and mtime decide without reading the file
+    return (
+        entry is not None
+        and entry["settings"] == settings
+        and entry["size"] == stat.st_size
+        and entry["mtime_ns"] == stat.st_mtime_ns
+        and chunks_exist(entry, output_folder)
+    )
+
+def output_name(filename):
+    """
+    Name of the folder receiving a source's chunks.
+
+    WAV sources keep their bare name, other formats get their extension appended, so
+    `talk.wav` and `talk.mp3` never write to the same folder.
+    """
+    stem, extension = os.path.splitext(filename)
+    if extension.lower() == ".wav":
+        return stem
+    return f"{stem}_{extension.lstrip('.').lower()}"
+
+def process_all_audios(input_folder, output_folder, chunk_length_ms=30000, overlap_ms=0, audio_format="wav", workers=None, save_every=100):
+    """
+    Chunk every audio file of a folder in parallel, skipping files that did not change.
+
+    A manifest in `output_folder` records each source's size, mtime, content hash, chunk
+    settings and chunk list. Files whose size and mtime match are skipped without being
+    read; files that were only touched are hashed and skipped if the content is the same.
+
+    Args:
+        input_folder (str): Folder with the source audio files.
+        output_folder (str): Folder receiving one sub-folder of chunks per source.
+        chunk_length_ms (int): Length of a chunk in milliseconds.
+        overlap_ms (int): Audio shared by consecutive chunks in milliseconds.
+        audio_format (str): "wav", or "flac" for lossless compressed chunks.
+        workers (int): Number of worker processes, defaults to the number of cores.
+        save_every (int): Files processed between manifest checkpoints.
+
+    Returns:
+        dict: The updated manifest.
+    """
     # Ensure output folder exists
     os.makedirs(output_folder, exist_ok=True)
 
-    # Process each audio file in the input folder
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".wav"):  # Modify if you have other audio formats
-            file_path = os.path.join(input_folder, filename)
+    settings = {"chunk_length_ms": chunk_length_ms, "overlap_ms": overlap_ms, "audio_format": audio_format}
+    manifest = load_manifest(output_folder)
+    filenames = sorted(f for f in os.listdir(input_folder) if f.lower().endswith(AUDIO_EXTENSIONS))
+
+    # Two sources sharing an output folder would overwrite each other's chunks
+    owners = {}
+    for filename in filenames:
+        owners.setdefault(output_name(filename), []).append(filename)
+    duplicates = [names for names in owners.values() if len(names) > 1]
+    if duplicates:
+        raise ValueError(f"Source files share an output folder, rename them: {duplicates}")
 
+    # Drop sources that no longer exist
+    existing = set(filenames)
+    manifest = {name: entry for name, entry in manifest.items() if name in existing}
+
+    tasks = {}
+    for filename in filenames:
+        file_path = os.path.join(input_folder, filename)
+        stat = os.stat(file_path)
+        entry = manifest.get(filename)
+        if is_up_to_date(entry, stat, settings, output_folder):
+            continue
+
+        reusable = entry is not None and entry["settings"] == settings and chunks_exist(entry, output_folder)
+        known_hash = entry["hash"] if reusable else None
+        tasks[filename] = (file_path, stat, known_hash)
+
+    print(f"{len(filenames) - len(tasks)} files up to date, {len(tasks)} to check")
+    if not tasks:
+        return manifest
+
+    start_time = time.perf_counter()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for filename, (file_path, stat, known_hash) in tasks.items():
             # Create a folder for the current audio's chunks
-            audio_name = os.path.splitext(filename)[0]
-            audio_output_folder = os.path.join(output_folder, audio_name)
-            os.makedirs(audio_output_folder, exist_ok=True)
+            audio_output_folder = os.path.join(output_folder, output_name(filename))
+            futures[pool.submit(chunk_source, file_path, audio_output_folder, settings, known_hash)] = filename
+
+        for future in as_completed(futures):
+            filename = futures[future]
+            file_path, stat, _ = tasks[filename]
+            try:
+                digest, chunk_paths = future.result()
+            except Exception as e:
+                print(f"Failed to chunk {filename}: {e}")
+                manifest.pop(filename, None)
+                continue
+
+            previous = manifest.get(filename)
+            if chunk_paths is None:
+                chunks = previous["chunks"]
+            else:
+                chunks = [os.path.relpath(path, output_folder) for path in chunk_paths]
+                # Chunks of the previous version that were not overwritten
+                if previous is not None:
+                    for stale in set(previous["chunks"]) - set(chunks):
+                        stale_path = os.path.join(output_folder, stale)
+                        if os.path.exists(stale_path):
+                            os.remove(stale_path)
+
+            manifest[filename] = {
+                "hash": digest,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "settings": settings,
+                "chunks": chunks
+            }
+
+            done += 1
+            if done % save_every == 0:
+                save_manifest(output_folder, manifest)
+                print(f"{done}/{len(tasks)} files in {time.perf_counter() - start_time:.1f}s")
+
+    save_manifest(output_folder, manifest)
+    print(f"Done. {len(tasks)} files checked in {time.perf_counter() - start_time:.1f}s")
+    return manifest
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Split a folder of audio files into fixed-length chunks.")
+    parser.add_argument("input_folder", nargs="?", default="audio_raw")
+    parser.add_argument("output_folder", nargs="?", default="output_chunk")
+    parser.add_argument("--chunk-length-ms", type=int, default=30000)
+    parser.add_argument("--overlap-ms", type=int, default=0)
+    parser.add_argument("--format", choices=sorted(CHUNK_WRITERS), default="wav")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    process_all_audios(
+        args.input_folder,
+        args.output_folder,
+        chunk_length_ms=args.chunk_length_ms,
+        overlap_ms=args.overlap_ms,
+        audio_format=args.format,
+        workers=args.workers
+    )
 
-            # Chunk the audio and save to the corresponding output folder
-            chunk_audio(file_path, audio_output_folder)
 
-# Example usage
-process_all_audios("audio_raw", "output_chunk" )
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,25 @@
 from tools.models import Model
+from tools.models import prewarm
 from tools.utils import logger
 
 import streamlit as st
 
+MODEL_TYPES = ["large","medium", "medium.en", "small", "small.en", "base", "base.en", "tiny.en", "tiny"]
+
+def start_prewarm() -> None:
+    """
+    Load the default Whisper model and the summarizer in the background while the page renders.
+    """
+    loaders = {
+        f"whisper-{model_type}": Model(model_type=model_type).load_model
+        for model_type in prewarm.configured_models([MODEL_TYPES[0]])
+    }
+    loaders["summarizer"] = Model.load_summarizer
+    prewarm.prewarm(loaders)
+
 def main():
+    start_prewarm()
+
     st.set_page_config(page_title="Extraction", page_icon="📺")
     hide_decoration_bar_style = '''<style>header {visibility: hidden;}</style>'''
     st.markdown(hide_decoration_bar_style, unsafe_allow_html=True)
@@ -18,7 +34,7 @@ def main():
     st.markdown('🚀 **Welcome to the Finance Audio Content Extraction** ✨ – Unlock financial insights from financial audio like never before! 🔍')
 
     with st.expander("Criterias", expanded=False):
-        model = st.selectbox("Choose transcribing model type", ["large","medium", "medium.en", "small", "small.en", "base", "base.en", "tiny.en", "tiny"])
+        model = st.selectbox("Choose transcribing model type", MODEL_TYPES)
         models = Model(model_type=model)
         audio_files = {
             "audios/supply_and_demand_explained_in_one_minute.wav": "Supply and Demand Explained in One Minute",
@@ -31,10 +47,20 @@ def main():
         # Map the selected name back to the file path
         selected_audio = [path for path, name in audio_files.items() if name == selected_name][0]
 
+        if not prewarm.is_ready():
+            st.caption("⏳ Models are still loading in the background, the first extraction may take longer.")
+
         if st.button('Generate Extraction', icon="🚀", type="primary"):
                 with st.spinner():
-                    transcription = models.transcribe(selected_audio)
-                    summarization = models.summarize_text(transcription)
+                    # Each segment is appended as its own element, so rendering stays constant time per segment
+                    transcript_box = st.container(height=200)
+                    segments = []
+                    for segment in models.transcribe_stream(selected_audio):
+                        transcript_box.text(str(segment))
+                        segments.append(segment.text)
+
+                    transcription = ''.join(segments)
+                    summarization = models.summarize_text(transcription, segments=segments)
                     st.text_area("Transcription", value=summarization, height=200)
 
 if __name__ ==  "__main__":
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# speech_common lives at the repository root and is shared by every app
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
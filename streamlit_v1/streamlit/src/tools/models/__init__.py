@@ -1,3 +1,7 @@
 from .model import Model
+from speech_common.cache import ResultCache, summary_cache, transcription_cache
+from speech_common.registry import ModelRegistry, registry
+from speech_common.segment import Segment
+from speech_common import prewarm
 
-__all__ = ["Model"]
\ No newline at end of file
+__all__ = ["Model", "ResultCache", "summary_cache", "transcription_cache", "ModelRegistry", "registry", "Segment", "prewarm"]
\ No newline at end of file
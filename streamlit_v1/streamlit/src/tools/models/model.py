@@ -1,17 +1,30 @@
-from faster_whisper import WhisperModel
+from speech_common.cache import cache_key, file_hash, summary_cache, text_hash, transcription_cache
+from speech_common.registry import registry, whisper_size_hint
+from speech_common.segment import Segment
+from speech_common.summarization import split_sentences, summarize_batch, summarize_long
 from tools.utils import logger
-from transformers import pipeline
 
+from typing import Iterator, List, Optional
+
+# faster_whisper and transformers pull in torch and take seconds to import, so they are
+# imported on first use instead of when the app starts.
 import warnings
 warnings.filterwarnings("ignore")
 
 import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
+SUMMARIZER_MODEL = "google/pegasus-xsum"
+
+# Decoding options of every transcription, part of the transcription cache key
+DECODE_OPTIONS = {"beam_size": 5, "temperature": 0.2, "language": None}
+
 class Model:
     def __init__(
             self, 
-            model_type: str
+            model_type: str,
+            device: str = "cpu",
+            compute_type: str = "int8"
             ):
         """
         Initialize the model with a specified type.
@@ -19,87 +32,192 @@ class Model:
         Args:
             model_type (str): Type of Whisper model. Options include "medium", "medium.en", "small", "small.en", 
                               "base", "base.en", "tiny.en", "tiny".
+            device (str): Device the Whisper model runs on.
+            compute_type (str): Weight precision of the Whisper model.
         """
         self.model_type = model_type
+        self.device = device
+        self.compute_type = compute_type
 
-    def load_model(self) -> WhisperModel:
+    def load_model(self) -> "WhisperModel":
         """
-        Load the WhisperModel for speech recognition.
+        Load the WhisperModel for speech recognition from the shared model registry.
 
         Returns:
             WhisperModel: Loaded model for speech recognition.
         """
-        return WhisperModel(self.model_type, device="cpu", compute_type="int8")
+        from faster_whisper import WhisperModel
+
+        return registry.get(
+            "faster-whisper",
+            self.model_type,
+            lambda: WhisperModel(self.model_type, device=self.device, compute_type=self.compute_type),
+            device=self.device,
+            compute_type=self.compute_type,
+            size_hint=whisper_size_hint(self.model_type, self.compute_type)
+        )
+
+    @staticmethod
+    def load_summarizer():
+        """
+        Load the summarization pipeline from the shared model registry.
+
+        Returns:
+            Pipeline: Loaded summarization pipeline.
+        """
+        from transformers import pipeline
+
+        return registry.get(
+            "transformers",
+            SUMMARIZER_MODEL,
+            lambda: pipeline(
+                "summarization",
+                model=SUMMARIZER_MODEL,
+                tokenizer=SUMMARIZER_MODEL,
+                use_fast=False
+            )
+        )
     
-    def transcribe(self, file_path: str) -> str:
+    def transcribe_stream(self, file_path: str) -> Iterator[Segment]:
         """
-        Transcribe text from speech.
+        Transcribe speech and yield every segment as soon as Whisper decodes it.
+
+        Results are cached on disk by audio content, model and decoding options, so a file
+        that was transcribed before comes back without running the model.
 
         Args:
             file_path (str): File path of the audio media.
 
-        Returns:
-            str: Joined string from the transcribed speech.
+        Yields:
+            Segment: Transcribed segments, in order.
         """
+        key = cache_key(
+            audio=file_hash(file_path),
+            model=self.model_type,
+            compute_type=self.compute_type,
+            **DECODE_OPTIONS
+        )
+        cached = transcription_cache.get(key)
+        if cached is not None:
+            logger.info(f"⚡ Transcription of {file_path} served from cache")
+            for start, end, text in cached:
+                yield Segment(start=start, end=end, text=text)
+            return
+
         model = self.load_model()
-        segments, info = model.transcribe(file_path, beam_size=5, temperature=0.2)
+        segments, info = model.transcribe(file_path, **DECODE_OPTIONS)
 
         logger.info(f"🔨 Detected language: {info.language} (Probability: {info.language_probability:.2f})")
 
-        text_segments = []
+        decoded = []
         for segment in segments:
             logger.info(f"✅ [{segment.start:.2f}s -> {segment.end:.2f}s] {segment.text}")
-            text_segments.append(segment.text)
-        
-        return ''.join(text_segments)
+            decoded.append((segment.start, segment.end, segment.text))
+            yield Segment(start=segment.start, end=segment.end, text=segment.text)
+
+        # Only complete transcriptions are stored, a consumer that stops early caches nothing
+        transcription_cache.put(key, decoded)
+
+    def transcribe_segments(self, file_path: str) -> List[str]:
+        """
+        Transcribe speech into Whisper segments.
+
+        Args:
+            file_path (str): File path of the audio media.
+
+        Returns:
+            List[str]: Text of every transcribed segment, in order.
+        """
+        return [segment.text for segment in self.transcribe_stream(file_path)]
+
+    def transcribe(self, file_path: str) -> str:
+        """
+        Transcribe text from speech.
+
+        Args:
+            file_path (str): File path of the audio media.
+
+        Returns:
+            str: Joined string from the transcribed speech.
+        """
+        return ''.join(self.transcribe_segments(file_path))
     
     @staticmethod
-    def calculate_summary_lengths(text: str) -> tuple:
+    def calculate_summary_lengths(num_tokens: int) -> tuple:
         """
         Calculate scalable max_length and min_length for text summarization.
 
         Args:
-            text (str): The text to be summarized.
+            num_tokens (int): Number of tokens of the text to be summarized.
 
         Returns:
-            tuple: A tuple containing max_length and min_length.
+            tuple: A tuple containing max_length and min_length, in tokens.
         """
-        text_length = len(text)
-
         # Define scaling factors
-        max_scaling_factor = 0.5  # max_length will be 20% of the text length
-        min_scaling_factor = 0.1  # min_length will be 10% of the text length
+        max_scaling_factor = 0.5  # max_length will be 50% of the input tokens
+        min_scaling_factor = 0.1  # min_length will be 10% of max_length
 
         # Calculate lengths
-        max_length = int(max(text_length * max_scaling_factor, 50))  # Ensure at least 50 characters
-        min_length = int(max(max_length * min_scaling_factor, 20))  # Ensure at least 20 characters
+        max_length = int(max(num_tokens * max_scaling_factor, 32))  # Ensure at least 32 tokens
+        min_length = int(max(max_length * min_scaling_factor, 10))  # Ensure at least 10 tokens
 
         # Apply upper limit for extremely long texts
-        max_length = min(max_length, 200)  # Cap max_length at 200 characters
-        min_length = min(min_length, 50)  # Cap min_length at 50 characters
+        max_length = min(max_length, 200)  # Cap max_length at 200 tokens
+        min_length = min(min_length, 50)  # Cap min_length at 50 tokens
 
         return max_length, min_length
 
-    def summarize_text(self, text: str) -> str:
+    def summarize_text(self, text: str, segments: Optional[List[str]] = None) -> str:
         """
         Summarize text from speech recognition's transcription.
 
+        Transcriptions longer than the model context are split into overlapping windows on
+        segment (or sentence) boundaries, summarized per window and reduced hierarchically.
+        Summaries are memoized, so summarizing the same transcription again costs no model compute.
+
         Args:
             text (str): String from the speech recognition's transcription.
+            segments (Optional[List[str]]): Whisper segments of the transcription, used as window boundaries.
 
         Returns:
             str: Summarized text.
         """
-        summarizer = pipeline(
-            "summarization",
-            model="google/pegasus-xsum",
-            tokenizer="google/pegasus-xsum",
-            use_fast=False
+        # Keyed by the whole transcript, so Whisper segments and split sentences of the same text
+        # share an entry, and looked up before the summarizer is loaded
+        key = cache_key(
+            text=text_hash(text),
+            model=SUMMARIZER_MODEL,
+            method="summarize_long",
+            do_sample=False
+        )
+        summary = summary_cache.get(key)
+        if summary is not None:
+            return summary
+
+        summary = summarize_long(
+            self.load_summarizer(),
+            segments or split_sentences(text),
+            length_fn=self.calculate_summary_lengths,
+            do_sample=False
         )
-        
-        max_length, min_length = self.calculate_summary_lengths(text)
+        summary_cache.put(key, summary)
+        return summary
 
-        logger.info(f"Summarizing text with max_length={max_length}, min_length={min_length}")
+    def summarize_batch(self, texts: List[str], batch_size: int = 8) -> List[str]:
+        """
+        Summarize several transcriptions at once in length-sorted, padded batches.
 
-        summary = summarizer(text, max_length=max_length, min_length=min_length, do_sample=False)
-        return summary[0]['summary_text']
+        Args:
+            texts (List[str]): Strings from the speech recognition's transcriptions.
+            batch_size (int): Maximum number of texts per forward pass.
+
+        Returns:
+            List[str]: Summarized texts in the same order as `texts`. Failed items start with "[ERROR]".
+        """
+        return summarize_batch(
+            self.load_summarizer(),
+            texts,
+            batch_size=batch_size,
+            length_fn=self.calculate_summary_lengths,
+            do_sample=False
+        )
@@ -1,6 +1,5 @@
 from tools.utils import logger
 
-import yt_dlp
 import os
 import re
 
@@ -34,6 +33,8 @@ class Downloader:
         Returns:
             None
         """
+        import yt_dlp
+
         try:
             # Extract video information
             with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
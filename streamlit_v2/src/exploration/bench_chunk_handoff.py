@@ -0,0 +1,63 @@
+import tempfile
+import time
+
+import numpy as np
+from pydub import AudioSegment
+
+from utils.audio import SAMPLE_RATE, prepare_segment, segment_to_float32
+
+
+def synthetic_audio(seconds: float = 600.0, sample_rate: int = 44100, seed: int = 0) -> AudioSegment:
+    """
+    Build a stereo 16-bit AudioSegment of noise-modulated tones, standing in for a recording.
+
+    :param seconds: Duration of the audio
+    :param sample_rate: Frame rate of the generated audio
+    :param seed: Random seed
+    :return: AudioSegment
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    signal = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 0.5 * t)) + 0.05 * rng.standard_normal(t.size)
+    pcm = (np.clip(signal, -1, 1) * 32767).astype(np.int16)
+    stereo = np.repeat(pcm[:, None], 2, axis=1)
+    return AudioSegment(stereo.tobytes(), frame_rate=sample_rate, sample_width=2, channels=2)
+
+
+def via_temp_file(chunk: AudioSegment) -> np.ndarray:
+    """
+    The previous handoff: export the chunk to a temporary WAV and let Whisper decode it with ffmpeg.
+    """
+    import whisper
+
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
+        chunk.export(temp_file.name, format="wav")
+        return whisper.load_audio(temp_file.name)
+
+
+def main(seconds: float = 600.0, chunk_seconds: float = 20.0):
+    audio = synthetic_audio(seconds)
+    step = int(chunk_seconds * 1000)
+
+    start = time.perf_counter()
+    chunks = [audio[i:i + step] for i in range(0, len(audio), step)]
+    temp_buffers = [via_temp_file(chunk) for chunk in chunks]
+    temp_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    prepared = prepare_segment(audio)
+    chunks = [prepared[i:i + step] for i in range(0, len(prepared), step)]
+    memory_buffers = [segment_to_float32(chunk) for chunk in chunks]
+    memory_elapsed = time.perf_counter() - start
+
+    # Both paths resample differently (ffmpeg vs pydub), so compare lengths rather than samples
+    assert all(abs(len(a) - len(b)) <= SAMPLE_RATE // 100 for a, b in zip(temp_buffers, memory_buffers))
+
+    print(f"{len(chunks)} chunks of {chunk_seconds:.0f}s")
+    print(f"temp file + ffmpeg : {temp_elapsed:.2f}s ({temp_elapsed / len(chunks) * 1000:.1f} ms/chunk)")
+    print(f"in-memory buffer   : {memory_elapsed:.2f}s ({memory_elapsed / len(chunks) * 1000:.1f} ms/chunk)")
+    print(f"speedup            : {temp_elapsed / max(memory_elapsed, 1e-9):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+from pydub import AudioSegment
+from pydub.silence import split_on_silence
+
+from utils.audio import SAMPLE_RATE
+from utils.silence import split_ranges
+
+
+def synthetic_speech(minutes: float = 60.0, seed: int = 0) -> np.ndarray:
+    """
+    Build 16 kHz mono int16 audio alternating tone bursts (0.5-8 s) and low noise pauses (0.1-2 s).
+
+    :param minutes: Duration of the audio
+    :param seed: Random seed
+    :return: int16 samples
+    """
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * SAMPLE_RATE)
+    samples = (rng.standard_normal(total) * 30).astype(np.int16)
+
+    position = 0
+    while position < total:
+        length = int(rng.uniform(0.5, 8.0) * SAMPLE_RATE)
+        t = np.arange(min(length, total - position)) / SAMPLE_RATE
+        samples[position:position + len(t)] += (8000 * np.sin(2 * np.pi * rng.uniform(120, 300) * t)).astype(np.int16)
+        position += length + int(rng.uniform(0.1, 2.0) * SAMPLE_RATE)
+
+    return samples
+
+
+def main(minutes: float = 60.0):
+    samples = synthetic_speech(minutes)
+    audio = AudioSegment(samples.tobytes(), frame_rate=SAMPLE_RATE, sample_width=2, channels=1)
+    settings = {"min_silence_len": 500, "silence_thresh": -40, "keep_silence": 200}
+
+    start = time.perf_counter()
+    ranges = split_ranges(samples, sample_rate=SAMPLE_RATE, **settings)
+    numpy_elapsed = time.perf_counter() - start
+    print(f"split_ranges     : {numpy_elapsed:.2f}s, {len(ranges)} chunks")
+
+    start = time.perf_counter()
+    chunks = split_on_silence(audio, **settings)
+    pydub_elapsed = time.perf_counter() - start
+    print(f"split_on_silence : {pydub_elapsed:.2f}s, {len(chunks)} chunks")
+
+    # pydub slides a min_silence_len window in 1 ms steps, the frames here are 10 ms, so boundaries differ slightly
+    print(f"chunk count difference: {abs(len(ranges) - len(chunks))}")
+    print(f"speedup: {pydub_elapsed / max(numpy_elapsed, 1e-9):.0f}x on {minutes:.0f} minutes of audio")
+
+
+if __name__ == "__main__":
+    main()
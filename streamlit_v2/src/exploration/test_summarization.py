@@ -1,6 +1,8 @@
 from transformers import pipeline
 import pandas as pd
-from tqdm import tqdm
+
+from utils import summarize_batch
+from utils.dataset_runner import export_csv, run_dataset
 
 import logging
 logging.getLogger("transformers").setLevel(logging.ERROR)
@@ -18,39 +20,34 @@ def get_model():
     )
     return model
 
-def summarize_text(summarizer, text):
-    # T5 needs "summarize: " prefix
-    input_text = "summarize: " + text.strip()
-    try:
-        summary = summarizer(
-            input_text,
-            truncation=True,
+def main():
+    summarizer = get_model()
+    output_dir = "t5_summarization_1"
+
+    batch_size = 16
+
+    # Results are appended to Parquet parts per batch, a rerun skips the rows already summarized.
+    # Length-sorted padded batches inside each call keep padding small.
+    run_dataset(
+        "test_cnn_daily_mail_data/test_summarization_batch_1.csv",
+        output_dir,
+        lambda texts: summarize_batch(
+            summarizer,
+            texts,
+            prefix="summarize: ",
+            batch_size=batch_size,
             max_length=512,
             min_length=20,
             do_sample=False
-        )[0]["summary_text"]
-    except Exception as e:
-        summary = f"[ERROR] {e}"
-    return summary
-
-def main():
-    summarizer = get_model()
-    df = pd.read_csv("test_cnn_daily_mail_data/test_summarization_batch_1.csv")
-
-    batch_size = 50
-    all_summaries = []
-
-    for i in range(0, len(df), batch_size):
-        print(f"Processing batch {i // batch_size + 1}...")
-        batch_df = df.iloc[i:i+batch_size].copy()
-
-        for text in tqdm(batch_df["article"], desc=f"Summarizing batch {i // batch_size + 1}"):
-            summary = summarize_text(summarizer, text)
-            all_summaries.append(summary)
+        ),
+        text_column="article",
+        output_column="generated_summary",
+        batch_size=4 * batch_size
+    )
 
-    df["generated_summary"] = all_summaries
-    print(df)
-    df.to_csv("t5_summarization_1.csv", index=False)
+    # Streamed part by part, the whole dataset is never held in memory
+    rows = export_csv(output_dir, "t5_summarization_1.csv")
+    print(f"Wrote {rows} summaries to t5_summarization_1.csv")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,38 +1,44 @@
 import whisper
 import librosa
 import soundfile as sf
-import tempfile
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+
+from utils import transcribe_parallel
+from utils.audio import SAMPLE_RATE, prepare_segment, segment_samples, segment_to_float32
+from utils.silence import split_ranges
 
 import warnings
 warnings.simplefilter("ignore", category=UserWarning)
 
 
-def chunk_audio_smart(file_path, min_silence_len=500, silence_thresh=-40):
+def chunk_audio_smart(file_path, min_silence_len=500, silence_thresh=-40, max_chunk_len=30000):
     """
     Splits an audio file into chunks using silence detection.
     
     :param file_path: Path to the audio file
     :param min_silence_len: Minimum silence duration (ms) to consider as a split point
     :param silence_thresh: Silence threshold in dB (lower means more aggressive silence detection)
-    :return: List of chunk file paths
+    :param max_chunk_len: Maximum chunk duration (ms), Whisper works on 30 s windows
+    :return: Tuple (float32 audio at 16 kHz, array of (start, end) sample indices of the chunks)
     """
-    audio = AudioSegment.from_file(file_path, format="wav")
+    # Resampled to Whisper's 16 kHz mono once, so chunks can be handed over without re-decoding
+    audio = prepare_segment(AudioSegment.from_file(file_path, format="wav"))
     
     # Split audio where silence is detected
-    chunks = split_on_silence(
-        audio, 
+    ranges = split_ranges(
+        segment_samples(audio),
+        sample_rate=SAMPLE_RATE,
         min_silence_len=min_silence_len, 
         silence_thresh=silence_thresh,
-        keep_silence=200  # Keep some silence at the edges to avoid harsh cuts
+        keep_silence=200,  # Keep some silence at the edges to avoid harsh cuts
+        max_chunk_len=max_chunk_len
     )
 
-    return chunks
+    return segment_to_float32(audio), ranges
 
 def transcribe_audio_chunks(file_path, model_type="turbo", min_silence_len=500, silence_thresh=-40):
     """
-    Transcribes an audio file in dynamically split chunks using temporary files.
+    Transcribes an audio file in dynamically split chunks, passed to Whisper as in-memory buffers.
 
     :param file_path: Path to the audio file
     :param model_type: Whisper model type (tiny, base, small, medium, large)
@@ -41,39 +47,59 @@ def transcribe_audio_chunks(file_path, model_type="turbo", min_silence_len=500,
     :return: Tuple (formatted transcript with timestamps, concatenated full text)
     """
     model = whisper.load_model(model_type)  # Load Whisper model
-    chunks = chunk_audio_smart(file_path, min_silence_len, silence_thresh)  # Get dynamically chunked audio
+    audio, ranges = chunk_audio_smart(file_path, min_silence_len, silence_thresh)  # Get dynamically chunked audio
     
     transcript = []
     full_text = []
-    start_time = 0.0  # Track the timestamp
     
-    for idx, chunk in enumerate(chunks):
-        # Create a temporary file to store the audio chunk
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_file:
-            chunk.export(temp_file.name, format="wav")  # Save chunk to temp file
-            
-            result = model.transcribe(temp_file.name)  # Transcribe the chunk
-            text = result["text"]
-            end_time = start_time + len(chunk) / 1000.0  # Convert ms to seconds
-
-            transcript.append(f"[{start_time:.2f}s -> {end_time:.2f}s] {text}")
-            print(f"[{start_time:.2f}s -> {end_time:.2f}s] {text}")  # Add timestamped text
-            full_text.append(text)  # Store transcribed text for concatenation
-
-        start_time = end_time  # Update timestamp
+    for start, end in ranges:
+        # Hand the chunk over as a view of the float32 buffer, no temporary file or ffmpeg decode
+        result = model.transcribe(audio[start:end])  # Transcribe the chunk
+        text = result["text"]
+        start_time, end_time = start / SAMPLE_RATE, end / SAMPLE_RATE  # Chunk position in the file
+
+        transcript.append(f"[{start_time:.2f}s -> {end_time:.2f}s] {text}")
+        print(f"[{start_time:.2f}s -> {end_time:.2f}s] {text}")  # Add timestamped text
+        full_text.append(text)  # Store transcribed text for concatenation
     
     return "\n".join(transcript), " ".join(full_text)  # Return both formatted and concatenated text
 
-# Usage
-file_path = "supply_and_demand_explained_in_one_minute.wav"
-model = whisper.load_model('turbo')  # Load Whisper model
-audio = AudioSegment.from_file(file_path)  # Load audio
-# If the audio is short, transcribe it as a whole
-if len(audio) / 1000 < 10:
-    result = model.transcribe(file_path)
-    print(result["text"])
+def transcribe_audio_parallel(file_path, model_type="small", workers=None, split="vad"):
+    """
+    Transcribes an audio file with VAD- or silence-bounded chunks spread over worker processes.
+
+    :param file_path: Path to the audio file
+    :param model_type: Whisper model type (tiny, base, small, medium, large, turbo)
+    :param workers: Number of worker processes, each holding its own int8 model
+    :param split: "vad" or "silence"
+    :return: Tuple (formatted transcript with timestamps, concatenated full text)
+    """
+    segments = transcribe_parallel(file_path, model_type=model_type, workers=workers, split=split)
+
+    transcript = [f"[{segment['start']:.2f}s -> {segment['end']:.2f}s] {segment['text']}" for segment in segments]
+    full_text = [segment["text"] for segment in segments]
+
+    return "\n".join(transcript), " ".join(full_text)
+
+def main():
+    # Usage
+    file_path = "supply_and_demand_explained_in_one_minute.wav"
+    model = whisper.load_model('turbo')  # Load Whisper model
+    audio = AudioSegment.from_file(file_path)  # Load audio
+    # If the audio is short, transcribe it as a whole
+    if len(audio) / 1000 < 10:
+        result = model.transcribe(file_path)
+        print(result["text"])
+
+    formatted_transcript, concatenated_text = transcribe_audio_chunks(file_path)
+
+    print("Formatted Transcript:\n", formatted_transcript)
+    print("\nConcatenated Text:\n", concatenated_text)
 
-formatted_transcript, concatenated_text = transcribe_audio_chunks(file_path)
+    # Same file, chunks transcribed in parallel worker processes
+    formatted_transcript, concatenated_text = transcribe_audio_parallel(file_path, model_type="turbo")
+    print("\nParallel Transcript:\n", formatted_transcript)
 
-print("Formatted Transcript:\n", formatted_transcript)
-print("\nConcatenated Text:\n", concatenated_text)
+# Worker processes are spawned and re-import this module, so nothing may run at import time
+if __name__ == "__main__":
+    main()
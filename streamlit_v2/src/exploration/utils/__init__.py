@@ -1,7 +1,36 @@
+import os
+import sys
+
+# speech_common lives at the repository root and is shared by every app
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
 from .log import logger
 from .evaluation import Evaluation
+from speech_common.registry import ModelRegistry, registry
+from speech_common.summarization import summarize_batch
+from .parallel_transcription import transcribe_parallel
+from .silence import split_ranges
+from .batch_transcription import transcribe_files
+from .dataset_runner import run_dataset
+from .rouge import rouge_scores
+from .bertscore import BertScorer
+from .meteor import meteor_scores
+from speech_common.aggregation import aggregate
 
 __all__ = [
     "logger",
-    "Evaluation"
+    "Evaluation",
+    "ModelRegistry",
+    "registry",
+    "summarize_batch",
+    "transcribe_parallel",
+    "split_ranges",
+    "transcribe_files",
+    "run_dataset",
+    "rouge_scores",
+    "BertScorer",
+    "meteor_scores",
+    "aggregate"
     ]
\ No newline at end of file
@@ -0,0 +1,47 @@
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+
+def prepare_segment(audio, sample_rate: int = SAMPLE_RATE):
+    """
+    Convert a pydub AudioSegment to the mono 16-bit format Whisper expects, once for the whole file.
+
+    :param audio: pydub AudioSegment
+    :param sample_rate: Target sample rate
+    :return: AudioSegment at `sample_rate`, mono, 16-bit
+    """
+    if audio.frame_rate != sample_rate:
+        audio = audio.set_frame_rate(sample_rate)
+    if audio.channels != 1:
+        audio = audio.set_channels(1)
+    if audio.sample_width != 2:
+        audio = audio.set_sample_width(2)
+    return audio
+
+
+def segment_samples(audio) -> np.ndarray:
+    """
+    View the raw PCM data of a pydub AudioSegment as integer samples, without copying.
+
+    :param audio: pydub AudioSegment
+    :return: Read-only array of shape (frames,) for mono or (frames, channels)
+    """
+    samples = np.frombuffer(audio.raw_data, dtype=_DTYPES[audio.sample_width])
+    if audio.channels > 1:
+        samples = samples.reshape(-1, audio.channels)
+    return samples
+
+
+def segment_to_float32(audio) -> np.ndarray:
+    """
+    Convert a prepared (16 kHz mono 16-bit) AudioSegment to the float32 buffer Whisper transcribes.
+
+    :param audio: pydub AudioSegment from `prepare_segment`
+    :return: float32 array in [-1, 1]
+    """
+    samples = segment_samples(audio).astype(np.float32)
+    samples *= 1.0 / 32768.0
+    return samples
@@ -0,0 +1,177 @@
+from utils import logger
+from speech_common.registry import registry, whisper_size_hint
+
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+import time
+import re
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Whisper decodes 30 s windows, longer clips are transcribed on their own
+MAX_CLIP_SECONDS = 30.0
+
+
+def clip_durations(paths: List[str]) -> List[float]:
+    """
+    Read the duration of every file from its header, without decoding the audio.
+
+    :param paths: Audio file paths
+    :return: Durations in seconds, infinity when the header cannot be read
+    """
+    import soundfile as sf
+
+    durations = []
+    for path in paths:
+        try:
+            durations.append(sf.info(path).duration)
+        except Exception:
+            durations.append(float("inf"))
+    return durations
+
+
+def pack_batches(durations: List[float], batch_size: int, max_clip_seconds: float = MAX_CLIP_SECONDS) -> List[List[int]]:
+    """
+    Group clips of similar length into batches, shortest first.
+
+    Clips longer than `max_clip_seconds` get a batch of their own.
+
+    :param durations: Duration of every clip
+    :param batch_size: Maximum clips per batch
+    :param max_clip_seconds: Longest clip that can share a batch
+    :return: Lists of clip indices
+    """
+    order = sorted(range(len(durations)), key=lambda i: durations[i])
+    short = [i for i in order if durations[i] <= max_clip_seconds]
+    long = [i for i in order if durations[i] > max_clip_seconds]
+
+    batches = [short[b:b + batch_size] for b in range(0, len(short), batch_size)]
+    return batches + [[i] for i in long]
+
+
+def _decode_batch(paths: List[str]) -> List[Optional[np.ndarray]]:
+    from faster_whisper import decode_audio
+
+    audios = []
+    for path in paths:
+        try:
+            audios.append(decode_audio(path, sampling_rate=SAMPLE_RATE))
+        except Exception as e:
+            logger.info(f"Failed to decode {path}: {e}")
+            audios.append(None)
+    return audios
+
+
+@lru_cache(maxsize=None)
+def _clips_in_seconds() -> bool:
+    """
+    Whether BatchedInferencePipeline reads clip timestamps in seconds (faster-whisper 1.2)
+    or in samples (1.1).
+    """
+    from faster_whisper import __version__
+
+    return tuple(int(part) for part in re.findall(r"\d+", __version__)[:2]) >= (1, 2)
+
+
+def _transcribe_batch(pipeline, audios: List[np.ndarray], batch_size: int, **options) -> List[str]:
+    """
+    Transcribe clips of at most 30 s in shared forward passes.
+
+    The clips are laid end to end and passed as explicit clip timestamps, so every clip
+    becomes one row of the encoder and decoder batch. Segments are mapped back to their
+    clip by their midpoint.
+    """
+    offsets = np.cumsum([0] + [len(audio) for audio in audios])
+    in_seconds = _clips_in_seconds()
+    clips = [
+        {"start": offsets[i] / SAMPLE_RATE, "end": offsets[i + 1] / SAMPLE_RATE} if in_seconds
+        else {"start": int(offsets[i]), "end": int(offsets[i + 1])}
+        for i in range(len(audios))
+        if offsets[i + 1] > offsets[i]
+    ]
+    texts = [[] for _ in audios]
+    if not clips:
+        return ["" for _ in audios]
+
+    starts = [offset / SAMPLE_RATE for offset in offsets[:-1]]
+    segments, _ = pipeline.transcribe(np.concatenate(audios), clip_timestamps=clips, batch_size=batch_size, **options)
+    for segment in segments:
+        texts[bisect_right(starts, (segment.start + segment.end) / 2) - 1].append(segment.text)
+
+    return ["".join(text).strip() for text in texts]
+
+
+def transcribe_files(
+        paths: List[str],
+        model_type: str = "turbo",
+        compute_type: str = "int8",
+        device: str = "cpu",
+        batch_size: int = 16,
+        beam_size: int = 5,
+        language: Optional[str] = None
+) -> Iterator[Tuple[str, str]]:
+    """
+    Transcribe many short clips with batched faster-whisper inference.
+
+    Files are sorted by duration and packed into batches of similar length. While a batch
+    runs through the model, the next one is decoded in a background thread. Results are
+    yielded batch by batch, shortest clips first.
+
+    :param paths: Audio file paths
+    :param model_type: Whisper model type (tiny, base, small, medium, large, turbo)
+    :param compute_type: CTranslate2 weight precision
+    :param device: Device the model runs on
+    :param batch_size: Clips per forward pass
+    :param beam_size: Beam size for decoding
+    :param language: Language code, detected once per batch when omitted
+    :return: Iterator of (path, transcription)
+    """
+    from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+    model = registry.get(
+        "faster-whisper",
+        model_type,
+        lambda: WhisperModel(model_type, device=device, compute_type=compute_type),
+        device=device,
+        compute_type=compute_type,
+        size_hint=whisper_size_hint(model_type, compute_type)
+    )
+    pipeline = BatchedInferencePipeline(model=model)
+
+    durations = clip_durations(paths)
+    batches = pack_batches(durations, batch_size)
+    logger.info(f"Transcribing {len(paths)} files in {len(batches)} batches")
+
+    done, audio_seconds = 0, 0.0
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=1) as decoder:
+        upcoming = decoder.submit(_decode_batch, [paths[i] for i in batches[0]]) if batches else None
+
+        for b, batch in enumerate(batches):
+            audios = upcoming.result()
+            # Decode the next batch while the model works on this one
+            if b + 1 < len(batches):
+                upcoming = decoder.submit(_decode_batch, [paths[i] for i in batches[b + 1]])
+
+            valid = [audio is not None for audio in audios]
+            decoded = [audio for audio in audios if audio is not None]
+
+            if len(batch) == 1 and decoded and len(decoded[0]) > MAX_CLIP_SECONDS * SAMPLE_RATE:
+                # Long clip, split by VAD and batched within the file
+                segments, _ = pipeline.transcribe(decoded[0], batch_size=batch_size, beam_size=beam_size, language=language)
+                texts = ["".join(segment.text for segment in segments).strip()]
+            else:
+                texts = _transcribe_batch(pipeline, decoded, batch_size, beam_size=beam_size, language=language)
+
+            texts = iter(texts)
+            for i, ok in zip(batch, valid):
+                yield paths[i], next(texts) if ok else ""
+
+            done += len(batch)
+            audio_seconds += sum(len(audio) for audio in decoded) / SAMPLE_RATE
+            elapsed = time.perf_counter() - start_time
+            logger.info(f"{done}/{len(paths)} files, {audio_seconds / max(elapsed, 1e-9):.1f}x realtime")
@@ -0,0 +1,207 @@
+from utils import logger
+from speech_common.registry import registry
+
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib
+import time
+import os
+
+import numpy as np
+import pandas as pd
+
+# Rough activation bytes per token and hidden unit kept alive during a no-grad forward pass
+ACTIVATION_FACTOR = 16
+
+
+def load_scorer_model(model_type: str, device: str = "cpu"):
+    """
+    Load the tokenizer and the truncated encoder BERTScore uses for `model_type`, once per process.
+
+    :param model_type: HuggingFace model name known to bert_score
+    :param device: Device the encoder runs on
+    :return: Tuple (tokenizer, model)
+    """
+    def loader():
+        from bert_score.utils import get_model, get_tokenizer, model2layers
+
+        tokenizer = get_tokenizer(model_type, use_fast=False)
+        model = get_model(model_type, model2layers[model_type])
+        model.to(device)
+        return tokenizer, model
+
+    return registry.get("bert-score", model_type, loader, device=device)
+
+
+def max_batch_tokens(model, device: str, memory_fraction: float = 0.25) -> int:
+    """
+    Choose how many padded tokens fit in one forward pass from the memory available now.
+
+    :param model: Encoder, used for its hidden size and attention heads
+    :param device: "cuda", "mps" or "cpu"
+    :param memory_fraction: Share of the free memory a batch may use
+    :return: Token budget per batch
+    """
+    import torch
+
+    if device.startswith("cuda") and torch.cuda.is_available():
+        free = torch.cuda.mem_get_info()[0]
+    else:
+        try:
+            free = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+        except (ValueError, OSError, AttributeError):
+            free = 2 * 1024 ** 3
+
+    config = model.config
+    hidden = getattr(config, "hidden_size", None) or getattr(config, "dim", 768)
+    heads = getattr(config, "num_attention_heads", None) or getattr(config, "n_heads", 12)
+    positions = getattr(config, "max_position_embeddings", 512)
+    bytes_per_token = 4 * (hidden * ACTIVATION_FACTOR + heads * positions)
+
+    return int(np.clip(free * memory_fraction / bytes_per_token, 512, 262144))
+
+
+class BertScorer:
+    def __init__(
+            self,
+            model_type: str = "distilbert-base-uncased",
+            device: str = "cpu",
+            cache_dir: Optional[str] = ".bertscore_cache",
+            batch_size: Optional[int] = None
+    ):
+        """
+        BERTScore with length-sorted batches and an on-disk cache of reference embeddings.
+
+        Scores match bert_score without idf weighting and baseline rescaling. Reference
+        token embeddings are stored per model and text hash, so scoring another system
+        against the same references only embeds its predictions.
+
+        :param model_type: HuggingFace model name known to bert_score
+        :param device: Device the encoder runs on
+        :param cache_dir: Folder of cached reference embeddings, None disables the cache
+        :param batch_size: Maximum texts per batch, chosen from free memory when omitted
+        """
+        self.model_type = model_type
+        self.device = device
+        self.batch_size = batch_size
+        self.cache_dir = os.path.join(cache_dir, model_type.replace("/", "__")) if cache_dir else None
+        self.tokenizer, self.model = load_scorer_model(model_type, device)
+
+    def _cache_path(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], digest + ".npy")
+
+    def iter_embed(self, texts: List[str]) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Normalized token embeddings of every text, yielded as each length-sorted padded batch finishes.
+
+        :param texts: Texts to embed
+        :return: Iterator of (index in `texts`, (tokens, hidden) float32 array), special tokens included
+        """
+        import torch
+        from bert_score.utils import sent_encode
+
+        encoded = [sent_encode(self.tokenizer, text) for text in texts]
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+        token_budget = max_batch_tokens(self.model, self.device)
+
+        batches, batch = [], []
+        for index in order:
+            # Texts are sorted, so the current one is the longest of the batch
+            padded = (len(batch) + 1) * len(encoded[index])
+            if batch and (padded > token_budget or (self.batch_size and len(batch) >= self.batch_size)):
+                batches.append(batch)
+                batch = []
+            batch.append(index)
+        if batch:
+            batches.append(batch)
+
+        self.model.eval()
+        for batch in batches:
+            longest = len(encoded[batch[-1]])
+            input_ids = torch.full((len(batch), longest), self.tokenizer.pad_token_id, dtype=torch.long)
+            attention_mask = torch.zeros((len(batch), longest), dtype=torch.long)
+            for row, index in enumerate(batch):
+                input_ids[row, :len(encoded[index])] = torch.tensor(encoded[index])
+                attention_mask[row, :len(encoded[index])] = 1
+
+            with torch.no_grad():
+                output = self.model(input_ids.to(self.device), attention_mask=attention_mask.to(self.device))[0]
+            output = output / torch.norm(output, dim=-1, keepdim=True)
+            output = output.float().cpu().numpy()
+
+            for row, index in enumerate(batch):
+                yield index, output[row, :len(encoded[index])]
+
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Like `iter_embed`, collected in the order of `texts`.
+        """
+        embeddings = [None] * len(texts)
+        for index, embedding in self.iter_embed(texts):
+            embeddings[index] = embedding
+        return embeddings
+
+    def embed_cached(self, texts: List[str]) -> List[np.ndarray]:
+        """
+        Like `embed`, but reads and writes the on-disk cache. Duplicate texts are embedded once
+        and every embedding is written as soon as its batch finishes.
+        """
+        if self.cache_dir is None:
+            return self.embed(texts)
+
+        found: Dict[str, np.ndarray] = {}
+        missing = []
+        for text in dict.fromkeys(texts):
+            path = self._cache_path(text)
+            if os.path.exists(path):
+                found[text] = np.load(path)
+            else:
+                missing.append(text)
+
+        logger.debug(f"BERTScore cache: {len(found)} references cached, {len(missing)} to embed")
+        for index, embedding in self.iter_embed(missing):
+            path = self._cache_path(missing[index])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            np.save(path + ".tmp.npy", embedding)
+            os.replace(path + ".tmp.npy", path)
+            found[missing[index]] = embedding
+
+        return [found[text] for text in texts]
+
+    @staticmethod
+    def _greedy_match(reference: np.ndarray, prediction: np.ndarray) -> tuple:
+        # Special tokens take part in the matching but get no weight, like bert_score's default idf
+        if len(reference) <= 2 or len(prediction) <= 2:
+            return 0.0, 0.0, 0.0
+        similarity = prediction @ reference.T
+        precision = float(similarity.max(axis=1)[1:-1].mean())
+        recall = float(similarity.max(axis=0)[1:-1].mean())
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        return precision, recall, f1
+
+    def score(self, references: List[str], predictions: List[str], block_size: int = 1024) -> pd.DataFrame:
+        """
+        Score every (reference, prediction) pair.
+
+        Pairs are embedded and matched `block_size` at a time, only the per-pair scores are
+        kept, so memory does not grow with the number of pairs.
+
+        :param references: Reference texts, embeddings cached on disk
+        :param predictions: Generated texts, aligned with `references`
+        :param block_size: Pairs embedded and matched at a time
+        :return: One row per pair with precision, recall and f1 columns
+        """
+        references = ["" if not isinstance(text, str) else text for text in references]
+        predictions = ["" if not isinstance(text, str) else text for text in predictions]
+
+        start_time = time.perf_counter()
+        scores = np.zeros((len(references), 3), dtype=np.float64)
+        for start in range(0, len(references), block_size):
+            reference_embeddings = self.embed_cached(references[start:start + block_size])
+            prediction_embeddings = self.embed(predictions[start:start + block_size])
+            for offset, (reference, prediction) in enumerate(zip(reference_embeddings, prediction_embeddings)):
+                scores[start + offset] = self._greedy_match(reference, prediction)
+            logger.info(f"BERTScore: {min(start + block_size, len(references))}/{len(references)} pairs")
+
+        logger.info(f"BERTScore computed for {len(scores)} pairs in {time.perf_counter() - start_time:.1f}s")
+        return pd.DataFrame(scores, columns=["precision", "recall", "f1"])
@@ -0,0 +1,172 @@
+from utils import logger
+
+from typing import Callable, Iterator, List, Optional
+import time
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+ROW_ID = "row_id"
+
+# part-<first position>-<end position>.parquet, positions of the rows in the input file
+PART_PATTERN = re.compile(r"part-(\d+)-(\d+)\.parquet")
+
+
+def completed_ranges(output_dir: str) -> np.ndarray:
+    """
+    Row positions already written to an output directory, as merged (start, end) ranges.
+
+    Part files are named after the range of input positions they cover, so only the file
+    names are read and the result grows with the number of gaps, not with the dataset.
+
+    :param output_dir: Directory of Parquet part files
+    :return: int64 array of shape (ranges, 2) with sorted, non-overlapping [start, end) positions
+    """
+    ranges = []
+    for path in glob.glob(os.path.join(output_dir, "part-*.parquet")):
+        match = PART_PATTERN.fullmatch(os.path.basename(path))
+        if match:
+            ranges.append((int(match.group(1)), int(match.group(2))))
+    if not ranges:
+        return np.empty((0, 2), dtype=np.int64)
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.array(merged, dtype=np.int64)
+
+
+def _is_done(positions: np.ndarray, done: np.ndarray) -> np.ndarray:
+    """
+    Boolean mask of the positions covered by the completed ranges.
+    """
+    if not len(done):
+        return np.zeros(len(positions), dtype=bool)
+    slot = np.searchsorted(done[:, 0], positions, side="right") - 1
+    return (slot >= 0) & (positions < done[np.maximum(slot, 0), 1])
+
+
+def count_rows(input_path: str, chunk_size: int) -> int:
+    """
+    Count the data rows of a CSV file, parsing a single column.
+    """
+    return sum(len(chunk) for chunk in pd.read_csv(input_path, usecols=[0], chunksize=chunk_size))
+
+
+def _write_part(output_dir: str, rows: pd.DataFrame, start: int, end: int) -> None:
+    # Named after the input positions it covers, positions in between that are not in the
+    # part were finished by an earlier run. Written under a temporary name first, a crash
+    # never leaves a half-written part behind
+    path = os.path.join(output_dir, f"part-{start:09d}-{end:09d}.parquet")
+    rows.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+
+
+def run_dataset(
+        input_path: str,
+        output_dir: str,
+        process_fn: Callable[[List[str]], List[str]],
+        text_column: str,
+        output_column: str,
+        chunk_size: int = 1024,
+        batch_size: int = 64,
+        id_column: Optional[str] = None
+) -> int:
+    """
+    Apply `process_fn` to a text column of a CSV file, resumably and in constant memory.
+
+    The input is read `chunk_size` rows at a time and every `batch_size` rows the results
+    are written to a new Parquet part file in `output_dir`, together with the input columns.
+    Rows are tracked by their position in the file, rows already in the output are skipped,
+    so a stopped run continues where it left off as long as the input is unchanged.
+
+    :param input_path: CSV file to process
+    :param output_dir: Directory receiving the Parquet part files
+    :param process_fn: Maps a list of texts to a list of results of the same length
+    :param text_column: Column passed to `process_fn`
+    :param output_column: Column receiving the results
+    :param chunk_size: Rows read from the CSV at a time
+    :param batch_size: Rows per `process_fn` call and per part file
+    :param id_column: Column copied to `row_id` in the output, defaults to the row position
+    :return: Number of rows processed by this run
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(output_dir, "*.tmp")):
+        os.remove(stale)
+
+    done = completed_ranges(output_dir)
+    total = count_rows(input_path, chunk_size)
+    finished = int(np.diff(np.minimum(done, total), axis=1).sum())
+    remaining = total - finished
+    logger.info(f"{finished} of {total} rows already done, {remaining} to go")
+
+    processed = 0
+    start_time = time.perf_counter()
+    for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+        # The chunks of read_csv share one running index, the position of the row in the file
+        positions = chunk.index.to_numpy(dtype=np.int64)
+        chunk[ROW_ID] = chunk[id_column] if id_column else positions
+        keep = ~_is_done(positions, done)
+        chunk, positions = chunk[keep], positions[keep]
+
+        for b in range(0, len(chunk), batch_size):
+            rows = chunk.iloc[b:b + batch_size].copy()
+            rows[output_column] = process_fn(rows[text_column].fillna("").tolist())
+            _write_part(output_dir, rows, int(positions[b]), int(positions[b + len(rows) - 1]) + 1)
+
+            processed += len(rows)
+            elapsed = time.perf_counter() - start_time
+            rate = processed / max(elapsed, 1e-9)
+            eta = (remaining - processed) / rate if rate else float("inf")
+            logger.info(f"{processed}/{remaining} rows, {rate:.2f} rows/s, ETA {eta / 60:.1f} min")
+
+    return processed
+
+
+def iter_output(output_dir: str) -> Iterator[pd.DataFrame]:
+    """
+    Yield the part files of an output directory one at a time, in input order.
+
+    :param output_dir: Directory of Parquet part files
+    :return: Iterator of one DataFrame per part file
+    """
+    # Zero-padded positions sort by name in input order, whatever the type of the ids
+    for path in sorted(glob.glob(os.path.join(output_dir, "part-*.parquet"))):
+        yield pd.read_parquet(path)
+
+
+def read_output(output_dir: str) -> pd.DataFrame:
+    """
+    Read every part file of an output directory, in input order.
+
+    :param output_dir: Directory of Parquet part files
+    :return: DataFrame of all processed rows
+    """
+    parts = list(iter_output(output_dir))
+    if not parts:
+        return pd.DataFrame(columns=[ROW_ID])
+    return pd.concat(parts, ignore_index=True)
+
+
+def export_csv(output_dir: str, path: str) -> int:
+    """
+    Write the rows of an output directory to a single CSV file, one part file at a time.
+
+    Only one part is held in memory, the header is written with the first part and the
+    following parts are appended.
+
+    :param output_dir: Directory of Parquet part files
+    :param path: CSV file to (over)write, without the row id column
+    :return: Number of rows written
+    """
+    rows = 0
+    for part in iter_output(output_dir):
+        part.drop(columns=ROW_ID).to_csv(path, mode="a" if rows else "w", header=not rows, index=False)
+        rows += len(part)
+    return rows
@@ -1,71 +1,127 @@
 from utils import logger
 
-from evaluate import load
-from rouge_score import rouge_scorer
-from rouge_score import scoring
+from speech_common.aggregation import aggregate, aggregate_rouge
+from utils.bertscore import BertScorer
+from utils.meteor import meteor_scores
+from utils.rouge import ROUGE_TYPES, rouge_scores
 
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 import pandas as pd
+import pyarrow.parquet as pq
 import torch
 from huggingface_hub import login
+import hashlib
+import glob
 import os
 import numpy as np
 
+def _cache_path(cache_dir: str, csv_path: str) -> str:
+    """
+    Parquet cache file of a CSV, named after its path, size and modification time.
+    """
+    stat = os.stat(csv_path)
+    digest = hashlib.sha256(os.path.abspath(csv_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{digest}-{stat.st_size}-{stat.st_mtime_ns}.parquet")
+
+
+def _load_columns(csv_path: str, columns: List[str], cache_dir: str) -> pd.DataFrame:
+    """
+    Load columns of a CSV through its Parquet cache, parsing the CSV only when the cache
+    is missing, stale or lacks one of the columns.
+    """
+    cache_path = _cache_path(cache_dir, csv_path)
+    parsed_columns = columns
+    if os.path.exists(cache_path):
+        cached_columns = pq.read_schema(cache_path).names
+        if set(columns) <= set(cached_columns):
+            return pd.read_parquet(cache_path, columns=columns)
+        # Re-parse with the cached columns too, so the cache keeps serving earlier metrics
+        parsed_columns = list(dict.fromkeys(cached_columns + columns))
+
+    df = pd.read_csv(csv_path, usecols=parsed_columns)
+
+    # Caches of previous versions of this file are dropped
+    prefix = os.path.basename(cache_path).split("-")[0]
+    for stale in glob.glob(os.path.join(cache_dir, f"{prefix}-*.parquet")):
+        os.remove(stale)
+    df.to_parquet(cache_path + ".tmp", index=False)
+    os.replace(cache_path + ".tmp", cache_path)
+    return df[columns]
+
+
 class Evaluation:
     def __init__(
             self,
             file_path: str,
-            token_id: str
+            token_id: str,
+            cache_dir: str = ".evaluation_cache"
     ):
         self.file_path = file_path
         self.token_id = token_id
+        self.cache_dir = cache_dir
+        self._data = None
 
     def _login_hg(self):
         login(token=self.token_id)
 
-    def _read_file(self):
-        df = pd.DataFrame()
+    def _read_file(self, columns: List[str]) -> Optional[pd.DataFrame]:
+        """
+        Load the needed columns of the dataset, once per Evaluation.
+
+        Every CSV is parsed once and cached as Parquet next to the source's mtime, so later
+        runs read the columnar cache until the CSV changes. Files are loaded in parallel.
+
+        :param columns: Columns used by the metric
+        :return: DataFrame with `columns`, or None when the path is not a CSV file or folder
+        """
+        if self._data is not None and set(columns) <= set(self._data.columns):
+            return self._data[columns]
 
         if os.path.isdir(self.file_path) is True:
             logger.info("This is a folder.")
-            csv_files = [f for f in os.listdir(self.file_path) if f.endswith('.csv')]
-            df_list = [pd.read_csv(os.path.join(self.file_path, file)) for file in csv_files]
-            df = pd.concat(df_list, ignore_index=True)
+            csv_files = sorted(os.path.join(self.file_path, f) for f in os.listdir(self.file_path) if f.endswith('.csv'))
         elif self.file_path.lower().endswith(".csv"):
             logger.info("Confirmed: it's a CSV file.")
-            df = pd.read_csv(self.file_path)
+            csv_files = [self.file_path]
         else:
             logger.error("Path does not exist or is not a directory.")
-    
-        return df
+            return None
+
+        # Keep the columns of earlier metrics, they are part of the same cache files
+        needed = columns
+        if self._data is not None:
+            needed = list(dict.fromkeys(list(self._data.columns) + columns))
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=min(8, len(csv_files)) or 1) as pool:
+            df_list = list(pool.map(lambda path: _load_columns(path, needed, self.cache_dir), csv_files))
+
+        self._data = pd.concat(df_list, ignore_index=True) if df_list else pd.DataFrame(columns=needed)
+        logger.info(f"Loaded {len(self._data)} rows from {len(csv_files)} files.")
+        return self._data[columns]
     
     def rouge(self, 
             refference_col: str, 
-            generated_summary: str
-        ) -> str:
-        df = self._read_file()
+            generated_summary: str,
+            workers: Optional[int] = None
+        ) -> pd.DataFrame:
+        df = self._read_file([refference_col, generated_summary])
         if df is None:
             logger.error("No data to process in ROUGE.")
             return
         
-        scorer = rouge_scorer.RougeScorer(['rouge1', 'rouge2', 'rougeL'], use_stemmer=True)
-        aggregator = scoring.BootstrapAggregator()
-
-        # Store per-row F1 scores to calculate mean and median manually
-        rouge_f1_scores = {
-            "rouge1": [],
-            "rouge2": [],
-            "rougeL": []
-        }
-
         logger.info(f"Starting evaluation with rouge1, rouge2, rougeL..")
-        for idx, row in df.iterrows():
-            scores = scorer.score(row[refference_col], row[generated_summary])
-            aggregator.add_scores(scores)
-
-            for key in rouge_f1_scores:
-                rouge_f1_scores[key].append(scores[key].fmeasure)
+        # Per-row precision, recall and F1, scored in parallel
+        scores = rouge_scores(
+            df[refference_col].tolist(),
+            df[generated_summary].tolist(),
+            rouge_types=ROUGE_TYPES,
+            workers=workers
+        )
 
-        result = aggregator.aggregate()
+        # Bootstrap confidence intervals, vectorized with a fixed seed
+        result = aggregate_rouge(scores, ROUGE_TYPES)
         logger.info("Done.")
 
         for key in result:
@@ -73,19 +129,21 @@ class Evaluation:
             print(f"  Precision:   {result[key].mid.precision:.4f}")
             print(f"  Recall:      {result[key].mid.recall:.4f}")
             print(f"  F1:          {result[key].mid.fmeasure:.4f}")
-            print(f"  F1 - Mean:   {np.mean(rouge_f1_scores[key]):.4f}")
-            print(f"  F1 - Median: {np.median(rouge_f1_scores[key]):.4f}")
+            print(f"  F1 - Mean:   {scores[f'{key}_fmeasure'].mean():.4f}")
+            print(f"  F1 - Median: {scores[f'{key}_fmeasure'].median():.4f}")
+
+        return scores
             
     def bert_score(self,
             refference_col: str, 
             generated_summary: str,
             model_type: str = "distilbert-base-uncased",
-            batch_size: int = 8
-        ):
+            batch_size: Optional[int] = None
+        ) -> pd.DataFrame:
         self._login_hg()
         logger.info("Logged into HuggingFace. Ready for BERTScore.")
 
-        df = self._read_file()
+        df = self._read_file([refference_col, generated_summary])
         if df is None:
             logger.error("No data to process in BERTscore.")
             return
@@ -97,44 +155,48 @@ class Evaluation:
         logger.info(f"This BERTscore evaluation using {torch_device}.")
         
         logger.info("Starting evaluation with BERTscore..")
-        bertscore = load("bertscore")
-        results = bertscore.compute(
-            predictions=df[generated_summary].tolist(),
+        # Reference embeddings are cached on disk, only new predictions go through the model
+        scorer = BertScorer(model_type=model_type, device=torch_device, batch_size=batch_size)
+        results = scorer.score(
             references=df[refference_col].tolist(),
-            lang="en",
-            model_type=model_type,  
-            batch_size=batch_size,
-            device=torch_device
+            predictions=df[generated_summary].tolist()
         )
         logger.info("Done.")
         
         print(f"BERTscore ({model_type})")
-        print(f"  Precision: {sum(results['precision']) / len(results['precision']):.4f}")
-        print(f"  Recall:    {sum(results['recall']) / len(results['recall']):.4f}")
-        print(f"  F1:        {sum(results['f1']) / len(results['f1']):.4f}")
+        print(f"  Precision: {results['precision'].mean():.4f}")
+        print(f"  Recall:    {results['recall'].mean():.4f}")
+        print(f"  F1:        {results['f1'].mean():.4f}")
+        intervals = aggregate(results, ["f1"])
+        print(f"  F1 - 95% CI: [{intervals.at['low', 'f1']:.4f}, {intervals.at['high', 'f1']:.4f}]")
+
+        return results
 
     def meteor(self,
             refference_col: str, 
             generated_summary: str,
-        ):
-        self._login_hg()
-        logger.info("Logged into HuggingFace. Ready for BERTScore.")
-
-        df = self._read_file()
+            workers: Optional[int] = None
+        ) -> pd.DataFrame:
+        df = self._read_file([refference_col, generated_summary])
         if df is None:
-            logger.error("No data to process in BERTscore.")
+            logger.error("No data to process in METEOR.")
             return
         
-        meteor = load("meteor")
-
-        references = df[refference_col].tolist()
-        predictions = df[generated_summary].tolist()
-
-        results = meteor.compute(predictions=predictions, references=references)
-        df["meteor"] = [results["meteor"]] * len(df)
+        logger.info("Starting evaluation with METEOR..")
+        # One score per row, so the median describes the distribution
+        df["meteor"] = meteor_scores(
+            references=df[refference_col].tolist(),
+            predictions=df[generated_summary].tolist(),
+            workers=workers
+        )
+        logger.info("Done.")
 
         mean_meteor = df["meteor"].mean()
         median_meteor = df["meteor"].median()
 
         print(f"Mean METEOR score:   {mean_meteor:.4f}")
-        print(f"Median METEOR score: {median_meteor:.4f}")
\ No newline at end of file
+        print(f"Median METEOR score: {median_meteor:.4f}")
+        intervals = aggregate(df, ["meteor"])
+        print(f"METEOR 95% CI:       [{intervals.at['low', 'meteor']:.4f}, {intervals.at['high', 'meteor']:.4f}]")
+
+        return df[["meteor"]]
@@ -0,0 +1,98 @@
+from utils import logger
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+import time
+import os
+
+import numpy as np
+
+NLTK_RESOURCES = {
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+}
+
+# METEOR parameters, evaluate's defaults
+_worker_params = (0.9, 3.0, 0.5)
+
+
+def ensure_nltk_data() -> None:
+    """
+    Download the NLTK data METEOR needs, only when it is missing.
+    """
+    import nltk
+
+    for name, resource in NLTK_RESOURCES.items():
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(name, quiet=True)
+
+
+def _init_worker(alpha: float, beta: float, gamma: float) -> None:
+    global _worker_params
+    from nltk.corpus import wordnet
+
+    # WordNet loads lazily on first lookup, load it before the first chunk instead
+    wordnet.ensure_loaded()
+    _worker_params = (alpha, beta, gamma)
+
+
+def _score_chunk(references: List[str], predictions: List[str]) -> np.ndarray:
+    from nltk import word_tokenize
+    from nltk.translate.meteor_score import single_meteor_score
+
+    alpha, beta, gamma = _worker_params
+    return np.array([
+        single_meteor_score(word_tokenize(reference), word_tokenize(prediction), alpha=alpha, beta=beta, gamma=gamma)
+        for reference, prediction in zip(references, predictions)
+    ], dtype=np.float64)
+
+
+def meteor_scores(
+        references: List[str],
+        predictions: List[str],
+        alpha: float = 0.9,
+        beta: float = 3.0,
+        gamma: float = 0.5,
+        workers: Optional[int] = None,
+        chunk_size: int = 200
+) -> np.ndarray:
+    """
+    METEOR of every (reference, prediction) pair, computed across a process pool.
+
+    Scores are the per-sample values evaluate's "meteor" metric averages, so their mean
+    equals its corpus score. WordNet is loaded once per worker.
+
+    :param references: Reference texts
+    :param predictions: Generated texts, aligned with `references`
+    :param alpha: Relative weight of precision and recall
+    :param beta: Shape of the fragmentation penalty
+    :param gamma: Relative weight of the fragmentation penalty
+    :param workers: Number of worker processes, defaults to the number of cores
+    :param chunk_size: Pairs per task
+    :return: float64 array with one score per pair
+    """
+    ensure_nltk_data()
+
+    references = ["" if not isinstance(text, str) else text for text in references]
+    predictions = ["" if not isinstance(text, str) else text for text in predictions]
+    chunks = [
+        (references[start:start + chunk_size], predictions[start:start + chunk_size])
+        for start in range(0, len(references), chunk_size)
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+
+    start_time = time.perf_counter()
+    if workers <= 1:
+        _init_worker(alpha, beta, gamma)
+        results = [_score_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(alpha, beta, gamma)) as pool:
+            results = list(pool.map(_score_chunk, *zip(*chunks)))
+
+    scores = np.concatenate(results) if results else np.empty(0)
+    logger.info(f"METEOR scored {len(scores)} pairs on {max(workers, 1)} processes in {time.perf_counter() - start_time:.1f}s")
+    return scores
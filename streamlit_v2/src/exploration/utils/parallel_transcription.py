@@ -0,0 +1,172 @@
+from utils import logger
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+import multiprocessing
+import time
+import os
+
+import numpy as np
+
+from utils.silence import split_ranges
+
+SAMPLE_RATE = 16000
+
+# WhisperModel owned by each worker process, loaded once by `_init_worker`
+_worker_model = None
+
+
+def _init_worker(model_type: str, compute_type: str, cpu_threads: int) -> None:
+    global _worker_model
+    from faster_whisper import WhisperModel
+
+    _worker_model = WhisperModel(model_type, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads)
+
+
+def _transcribe_chunk(index: int, start: int, audio: np.ndarray, beam_size: int, language: Optional[str]) -> Tuple[int, List[dict]]:
+    segments, _ = _worker_model.transcribe(audio, beam_size=beam_size, language=language)
+    offset = start / SAMPLE_RATE
+    return index, [
+        {"start": offset + segment.start, "end": offset + segment.end, "text": segment.text}
+        for segment in segments
+    ]
+
+
+def speech_ranges_vad(audio: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Find speech regions with the Silero VAD bundled in faster-whisper.
+
+    :param audio: Mono float32 audio at 16 kHz
+    :return: List of (start, end) sample indices
+    """
+    from faster_whisper.vad import get_speech_timestamps
+
+    return [(ts["start"], ts["end"]) for ts in get_speech_timestamps(audio)]
+
+
+def speech_ranges_silence(audio: np.ndarray, min_silence_len: int = 500, silence_thresh: int = -40, keep_silence: int = 200, **kwargs) -> List[Tuple[int, int]]:
+    """
+    Find non-silent regions with the NumPy silence detector.
+
+    :param audio: Mono float32 audio at 16 kHz
+    :param min_silence_len: Minimum silence duration (ms) to consider as a split point
+    :param silence_thresh: Silence threshold in dB
+    :param keep_silence: Silence (ms) kept around each region
+    :param kwargs: hysteresis and frame_ms of `split_ranges`
+    :return: List of (start, end) sample indices
+    """
+    ranges = split_ranges(
+        audio,
+        sample_rate=SAMPLE_RATE,
+        min_silence_len=min_silence_len,
+        silence_thresh=silence_thresh,
+        keep_silence=keep_silence,
+        **kwargs
+    )
+    return [(int(start), int(end)) for start, end in ranges]
+
+
+def plan_chunks(ranges: List[Tuple[int, int]], max_chunk_seconds: float = 30.0) -> List[Tuple[int, int]]:
+    """
+    Merge neighbouring speech regions into chunks of at most `max_chunk_seconds`.
+
+    Regions longer than the limit are cut into slices of the maximum length.
+
+    :param ranges: Sorted (start, end) sample indices of speech
+    :param max_chunk_seconds: Maximum chunk duration in seconds
+    :return: List of (start, end) sample indices
+    """
+    max_samples = int(max_chunk_seconds * SAMPLE_RATE)
+    chunks = []
+
+    for start, end in ranges:
+        # Padding around regions can make them overlap, never transcribe the same audio twice
+        if chunks and start < chunks[-1][1]:
+            start = chunks[-1][1]
+        if end <= start:
+            continue
+
+        if chunks and end - chunks[-1][0] <= max_samples:
+            chunks[-1] = (chunks[-1][0], end)
+            continue
+
+        while end - start > max_samples:
+            chunks.append((start, start + max_samples))
+            start += max_samples
+        chunks.append((start, end))
+
+    return chunks
+
+
+def transcribe_parallel(
+        file_path: str,
+        model_type: str = "small",
+        workers: Optional[int] = None,
+        cpu_threads: Optional[int] = None,
+        compute_type: str = "int8",
+        split: str = "vad",
+        max_chunk_seconds: float = 30.0,
+        beam_size: int = 5,
+        language: Optional[str] = None,
+        **silence_kwargs
+) -> List[dict]:
+    """
+    Transcribe an audio file by spreading VAD- or silence-bounded chunks over worker processes.
+
+    Every worker holds its own int8 WhisperModel. Chunks are scheduled longest first so the pool
+    drains evenly, and the segments are merged back in order with absolute timestamps.
+
+    :param file_path: Path to the audio file
+    :param model_type: Whisper model type (tiny, base, small, medium, large, turbo)
+    :param workers: Number of worker processes, defaults to a quarter of the cores
+    :param cpu_threads: Threads per worker, defaults to cores / workers
+    :param compute_type: CTranslate2 weight precision
+    :param split: "vad" for Silero VAD, "silence" for energy-based silence detection
+    :param max_chunk_seconds: Maximum duration of a chunk
+    :param beam_size: Beam size for decoding
+    :param language: Language code, detected per chunk when omitted
+    :param silence_kwargs: min_silence_len, silence_thresh and keep_silence for split="silence"
+    :return: List of {"start", "end", "text"} segments in order
+    """
+    from faster_whisper import decode_audio
+
+    cores = os.cpu_count() or 1
+    workers = workers or max(1, cores // 4)
+    cpu_threads = cpu_threads or max(1, cores // workers)
+
+    audio = decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+    if split == "vad":
+        ranges = speech_ranges_vad(audio)
+    elif split == "silence":
+        ranges = speech_ranges_silence(audio, **silence_kwargs)
+    else:
+        raise ValueError(f"Unknown split method: {split}")
+
+    chunks = plan_chunks(ranges, max_chunk_seconds)
+    logger.info(f"Transcribing {len(chunks)} chunks on {workers} workers x {cpu_threads} threads")
+
+    # Longest chunks first, so no worker is left with a long tail at the end
+    schedule = sorted(range(len(chunks)), key=lambda i: chunks[i][1] - chunks[i][0], reverse=True)
+
+    results = [None] * len(chunks)
+    start_time = time.perf_counter()
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(model_type, compute_type, cpu_threads)
+    ) as pool:
+        futures = [
+            pool.submit(_transcribe_chunk, i, chunks[i][0], audio[chunks[i][0]:chunks[i][1]], beam_size, language)
+            for i in schedule
+        ]
+        for future in as_completed(futures):
+            index, segments = future.result()
+            results[index] = segments
+
+    elapsed = time.perf_counter() - start_time
+    duration = len(audio) / SAMPLE_RATE
+    logger.info(f"Done. {duration:.0f}s of audio in {elapsed:.1f}s ({duration / max(elapsed, 1e-9):.1f}x realtime)")
+
+    return [segment for chunk_segments in results for segment in chunk_segments]
@@ -0,0 +1,79 @@
+from utils import logger
+from speech_common.tokenizer import CachedTokenizer
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence
+import time
+import os
+
+import numpy as np
+import pandas as pd
+
+ROUGE_TYPES = ("rouge1", "rouge2", "rougeL")
+
+# RougeScorer built once per worker process by `_init_worker`
+_worker_scorer = None
+
+
+def _init_worker(rouge_types: Sequence[str], use_stemmer: bool) -> None:
+    global _worker_scorer
+    from rouge_score import rouge_scorer
+
+    _worker_scorer = rouge_scorer.RougeScorer(list(rouge_types), tokenizer=CachedTokenizer(use_stemmer))
+
+
+def _score_chunk(references: List[str], predictions: List[str]) -> np.ndarray:
+    rouge_types = _worker_scorer.rouge_types
+    scores = np.empty((len(references), 3 * len(rouge_types)), dtype=np.float64)
+    for i, (reference, prediction) in enumerate(zip(references, predictions)):
+        result = _worker_scorer.score(reference, prediction)
+        scores[i] = [value for rouge_type in rouge_types for value in result[rouge_type]]
+    return scores
+
+
+def rouge_scores(
+        references: List[str],
+        predictions: List[str],
+        rouge_types: Sequence[str] = ROUGE_TYPES,
+        use_stemmer: bool = True,
+        workers: Optional[int] = None,
+        chunk_size: int = 500
+) -> pd.DataFrame:
+    """
+    Score every (reference, prediction) pair with ROUGE across a process pool.
+
+    Pairs are sent to the workers in chunks. Each worker holds one RougeScorer, which
+    tokenizes and stems every text once per pair and caches the stems of known words.
+
+    :param references: Reference summaries
+    :param predictions: Generated summaries, aligned with `references`
+    :param rouge_types: ROUGE variants to compute
+    :param use_stemmer: Apply the Porter stemmer, as RougeScorer(use_stemmer=True)
+    :param workers: Number of worker processes, defaults to the number of cores
+    :param chunk_size: Pairs per task
+    :return: One row per pair with `<type>_precision`, `<type>_recall` and `<type>_fmeasure` columns
+    """
+    columns = [f"{rouge_type}_{field}" for rouge_type in rouge_types for field in ("precision", "recall", "fmeasure")]
+    references = ["" if not isinstance(text, str) else text for text in references]
+    predictions = ["" if not isinstance(text, str) else text for text in predictions]
+
+    chunks = [
+        (references[start:start + chunk_size], predictions[start:start + chunk_size])
+        for start in range(0, len(references), chunk_size)
+    ]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+
+    start_time = time.perf_counter()
+    if workers <= 1:
+        # A pool is not worth starting for a single chunk or a single core
+        _init_worker(rouge_types, use_stemmer)
+        results = [_score_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(rouge_types, use_stemmer)) as pool:
+            results = list(pool.map(_score_chunk, *zip(*chunks)))
+
+    scores = np.concatenate(results) if results else np.empty((0, len(columns)))
+    elapsed = time.perf_counter() - start_time
+    logger.info(f"ROUGE scored {len(scores)} pairs on {max(workers, 1)} processes in {elapsed:.1f}s")
+
+    return pd.DataFrame(scores, columns=columns)
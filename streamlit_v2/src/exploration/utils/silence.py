@@ -0,0 +1,163 @@
+from typing import Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SAMPLE_RATE = 16000
+
+
+def frame_db(samples: np.ndarray, frame_length: int, hop_length: int, block_frames: int = 1 << 16) -> np.ndarray:
+    """
+    RMS level of every frame in dBFS, computed on strided views of the signal.
+
+    Frames are processed in blocks so only `block_frames` frames are ever squared at once.
+
+    :param samples: Mono integer or float samples, integers are scaled to their full range
+    :param frame_length: Samples per frame
+    :param hop_length: Samples between the starts of consecutive frames
+    :param block_frames: Frames processed per block
+    :return: float32 array with one level per frame, -inf for digital silence
+    """
+    if samples.dtype.kind in "iu":
+        full_scale = float(np.iinfo(samples.dtype).max) + 1.0
+    else:
+        full_scale = 1.0
+
+    if len(samples) < frame_length:
+        samples = np.pad(samples, (0, frame_length - len(samples)))
+    frames = sliding_window_view(samples, frame_length)[::hop_length]
+
+    levels = np.empty(len(frames), dtype=np.float32)
+    for start in range(0, len(frames), block_frames):
+        block = frames[start:start + block_frames].astype(np.float32)
+        block *= 1.0 / full_scale
+        np.square(block, out=block)
+        levels[start:start + len(block)] = block.mean(axis=1)
+
+    with np.errstate(divide="ignore"):
+        return 10.0 * np.log10(levels)
+
+
+def _runs(mask: np.ndarray) -> np.ndarray:
+    """
+    Start and end (exclusive) indices of the runs of True in a boolean array.
+    """
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    return edges.reshape(-1, 2)
+
+
+def silent_frames(levels: np.ndarray, silence_thresh: float, hysteresis: float = 0.0) -> np.ndarray:
+    """
+    Classify frames as silent with a two-threshold (hysteresis) gate.
+
+    A frame below `silence_thresh` is silent and a frame above `silence_thresh + hysteresis`
+    is speech; frames in between keep the state of the last frame that crossed a threshold,
+    so the level hovering around the threshold does not flip the state back and forth.
+
+    :param levels: Frame levels in dBFS
+    :param silence_thresh: Level (dBFS) under which a frame is silent
+    :param hysteresis: Width (dB) of the band in which the previous state is kept
+    :return: Boolean array, True for silent frames
+    """
+    silent = levels < silence_thresh
+    if hysteresis <= 0:
+        return silent
+
+    decided = silent | (levels > silence_thresh + hysteresis)
+    # Index of the last decided frame at every position, forward-filled with a running maximum
+    last = np.where(decided, np.arange(len(levels)), -1)
+    np.maximum.accumulate(last, out=last)
+    # Frames before any decision start out as speech
+    return np.where(last >= 0, silent[np.maximum(last, 0)], False)
+
+
+def split_ranges(
+        samples: np.ndarray,
+        sample_rate: int = SAMPLE_RATE,
+        min_silence_len: int = 500,
+        silence_thresh: float = -40.0,
+        keep_silence: int = 200,
+        hysteresis: float = 0.0,
+        max_chunk_len: Optional[int] = None,
+        frame_ms: int = 10
+) -> np.ndarray:
+    """
+    Find the non-silent chunks of a signal, as sample indices.
+
+    Counterpart of `pydub.silence.split_on_silence`: silences of at least `min_silence_len`
+    split the signal, each chunk keeps up to `keep_silence` of the surrounding silence (shared
+    halves when two chunks are closer than that) and chunks longer than `max_chunk_len` are cut
+    at their quietest frame. The cap includes the kept silence, so no returned chunk is longer
+    than `max_chunk_len`. Nothing is copied, slice the original samples with the result.
+
+    :param samples: Mono samples
+    :param sample_rate: Sample rate of `samples`
+    :param min_silence_len: Minimum silence duration (ms) to consider as a split point
+    :param silence_thresh: Silence threshold in dBFS
+    :param keep_silence: Silence (ms) kept around each chunk
+    :param hysteresis: Band (dB) above `silence_thresh` in which the previous state is kept
+    :param max_chunk_len: Maximum chunk duration (ms), unlimited when omitted
+    :param frame_ms: Frame and hop duration (ms) of the energy analysis
+    :return: int64 array of shape (chunks, 2) with (start, end) sample indices, empty for empty input
+    """
+    if len(samples) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    hop = max(1, sample_rate * frame_ms // 1000)
+    levels = frame_db(samples, hop, hop)
+    silent = silent_frames(levels, silence_thresh, hysteresis)
+
+    # Silences shorter than the minimum do not split anything
+    min_frames = max(1, -(-min_silence_len // frame_ms))
+    silences = _runs(silent)
+    short = silences[silences[:, 1] - silences[:, 0] < min_frames]
+    if len(short):
+        toggle = np.zeros(len(silent) + 1, dtype=np.int8)
+        np.add.at(toggle, short[:, 0], 1)
+        np.add.at(toggle, short[:, 1], -1)
+        silent &= np.cumsum(toggle[:-1]) == 0
+
+    ranges = _runs(~silent) * hop
+    if not len(ranges):
+        return np.empty((0, 2), dtype=np.int64)
+    ranges[:, 1] = np.minimum(ranges[:, 1], len(samples))
+
+    pad = sample_rate * keep_silence // 1000
+    if max_chunk_len:
+        # Cap the speech so that it still fits once padded on both sides, padding never
+        # takes more than half of a chunk
+        max_samples = sample_rate * max_chunk_len // 1000
+        pad = min(pad, max_samples // 4)
+        ranges = _cap_length(ranges, levels, hop, max_samples - 2 * pad)
+
+    # Pad with kept silence, splitting the gap in half where neighbours would overlap
+    starts = ranges[:, 0] - pad
+    ends = ranges[:, 1] + pad
+    gaps = ranges[1:, 0] - ranges[:-1, 1]
+    tight = gaps < 2 * pad
+    middle = ranges[:-1, 1] + gaps // 2
+    ends[:-1] = np.where(tight, middle, ends[:-1])
+    starts[1:] = np.where(tight, middle, starts[1:])
+
+    return np.stack([np.maximum(starts, 0), np.minimum(ends, len(samples))], axis=1).astype(np.int64)
+
+
+def _cap_length(ranges: np.ndarray, levels: np.ndarray, hop: int, max_samples: int) -> np.ndarray:
+    """
+    Cut ranges longer than `max_samples` at the quietest frame of the second half of each window.
+    """
+    max_frames = max(2, max_samples // hop)
+    capped = []
+    for start, end in ranges // hop:
+        end = max(end, start + 1)
+        while end - start > max_frames:
+            window = levels[start + max_frames // 2:start + max_frames]
+            cut = start + max_frames // 2 + int(np.argmin(window))
+            capped.append((start, cut))
+            start = cut
+        capped.append((start, end))
+
+    capped = np.array(capped, dtype=np.int64) * hop
+    capped[:, 0] = np.maximum(capped[:, 0], ranges[0, 0])
+    capped[:, 1] = np.minimum(capped[:, 1], ranges[-1, 1])
+    return capped
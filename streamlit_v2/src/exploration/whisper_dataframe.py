@@ -2,9 +2,10 @@ import tempfile
 import os
 import pandas as pd
 import re
-import whisper
 from tqdm import tqdm 
 
+from utils import transcribe_files
+
 import warnings  
 warnings.filterwarnings("ignore")
 
@@ -25,17 +26,39 @@ def link_to_dataframe(folder_path: str) -> pd.DataFrame:
 
     return df
 
-def transcribe(df:pd.DataFrame):
-    model = whisper.load_model('turbo')
+def transcribe(df:pd.DataFrame, output_path: str = None, batch_size: int = 16) -> pd.DataFrame:
+    """
+    Transcribe every file of the dataframe with batched faster-whisper inference.
+
+    Files are processed shortest first in batches; each finished batch is appended to
+    `output_path` right away, so partial results are on disk while the run continues.
+    """
+    if output_path is not None and os.path.exists(output_path):
+        os.remove(output_path)
 
     results = []  # Store transcriptions
+    pending = []
+
+    paths = df["audio_file_path"].tolist()
+    for path, text in tqdm(transcribe_files(paths, batch_size=batch_size), total=len(paths), desc="Transcribing", unit="file"):
+        pending.append({"audio_file_path": path, "transcription": text})
+
+        if len(pending) >= batch_size:
+            _flush(pending, output_path)
+            results.extend(pending)
+            pending = []
+
+    _flush(pending, output_path)
+    results.extend(pending)
+
+    # Back to the order of the input dataframe
+    transcriptions = pd.DataFrame(results, columns=["audio_file_path", "transcription"])
+    return df[["audio_file_path"]].merge(transcriptions, on="audio_file_path", how="left")
 
-    for path in tqdm(df["audio_file_path"], desc="Transcribing", unit="file"):
-        print(f"Transcribing: {path}")  # Optional: Show progress
-        result = model.transcribe(path)
-        results.append({"audio_file_path": path, "transcription": result["text"]}),
-    
-    return pd.DataFrame(results)
+def _flush(rows: list, output_path: str) -> None:
+    if output_path is None or not rows:
+        return
+    pd.DataFrame(rows).to_csv(output_path, mode="a", header=not os.path.exists(output_path), index=False)
 
 def main():
     df = link_to_dataframe('00a36b039cb49e6b99bb6d17635a3c25')  # Get DataFrame with file paths
@@ -43,7 +66,8 @@ def main():
     df = df.sort_values(by='filename')
     print(df)
 
-    transcriptions_df = transcribe(df)  # Transcribe audio files
+    # Rows are appended to text_partial.csv as batches finish, text.csv keeps the input order
+    transcriptions_df = transcribe(df, output_path="text_partial.csv")  # Transcribe audio files
     transcriptions_df.to_csv("text.csv")
 
 if __name__ == "__main__":  
@@ -1,13 +1,31 @@
 import streamlit as st
-import whisper
 import tempfile
-from transformers import pipeline
-
+import sys
 import os
 
+# speech_common lives at the repository root and is shared by every app
+_REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if _REPO_ROOT not in sys.path:
+    sys.path.append(_REPO_ROOT)
+
+from speech_common import prewarm
+from speech_common.cache import cache_key, file_hash, summary_cache, text_hash, transcription_cache
+from speech_common.jobs import QueueFull, job_queue
+from speech_common.registry import registry, whisper_size_hint
+from speech_common.segment import Segment
+from typing import Callable, Iterator, Optional
+
+# faster_whisper and transformers pull in torch, they are imported on first use (or by the
+# background prewarm thread) so the page renders without waiting for them.
+
+import time
+
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
-state = dict(result=0)
+MODEL_TYPES = ("turbo",)
+
+# Decoding options of every transcription, part of the transcription cache key
+DECODE_OPTIONS = {"beam_size": 5, "temperature": 0.2, "language": None}
 
 
 class Interface:
@@ -55,64 +73,147 @@ class Interface:
 
         model_type = st.selectbox(
             "Model type",
-            (
-                "turbo",
-            ),
+            MODEL_TYPES,
             index=0,
             help="Select the model size for speech recognition.",
         )
 
         return model_type
 
+    def show_job(self, job_id: str) -> None:
+        """
+        Display the progress, partial segments and results of a job, refreshing until it finishes.
+
+        The page polls inside this script run instead of rerunning it, so segments already on
+        screen stay there and every poll only appends the new ones. The segments read so far
+        are kept in the session, a rerun redraws them without reading them again.
+        """
+        if st.session_state.get("segments_job") != job_id:
+            st.session_state["segments_job"] = job_id
+            st.session_state["segments"] = []
+        segments = st.session_state["segments"]
+
+        status = st.empty()
+        progress = st.empty()
+        with st.expander("Transcription", expanded=True):
+            st.subheader("Transcription Result")
+            text_container = st.container(height=300)
+            for start, end, text in segments:
+                text_container.text(str(Segment(start=start, end=end, text=text)))
+            result_container = st.container()
+
+        while True:
+            job = job_queue.get(job_id)
+            if job is None:
+                status.error("This job no longer exists, please submit the file again.")
+                return
+
+            if job["status"] == "queued" and segments:
+                # The job was requeued after its worker stopped, it starts over
+                segments.clear()
+                st.rerun()
+            if job["status"] == "queued":
+                status.info(f"⏳ Waiting in the queue, {job['position']} jobs ahead.")
+            else:
+                status.empty()
+            progress.progress(job["progress"], text=job["message"] or job["status"].capitalize())
+
+            for start, end, text in job_queue.segments(job_id, len(segments)):
+                text_container.text(str(Segment(start=start, end=end, text=text)))
+                segments.append((start, end, text))
+
+            if job["status"] in ("done", "failed"):
+                break
+            time.sleep(1)
+
+        if job["status"] == "done":
+            result_container.text_area("Transcription:", job["result"]["transcription"], height=300)
+            with st.expander("Summarization", expanded=True):
+                st.subheader("Summarization Result")
+                st.text_area("Summary:", job["result"]["summary"], height=300)
+        else:
+            st.error(f"An error occured: {job['error']}", icon="🚨")
+
 
 class Generation:
     def __init__(self):
         pass
 
-    def _load_model(self, model_type: str) -> whisper:
+    def _load_model(self, model_type: str) -> "WhisperModel":
         """
-        Load the Whisper model for speech recognition.
+        Load the faster-whisper model for speech recognition from the shared model registry.
         """
-        return whisper.load_model(model_type)
+        from faster_whisper import WhisperModel
+
+        return registry.get(
+            "faster-whisper",
+            model_type,
+            lambda: WhisperModel(model_type, device="cpu", compute_type="int8"),
+            device="cpu",
+            compute_type="int8",
+            size_hint=whisper_size_hint(model_type, "int8"),
+        )
 
-    def _transcribe_model(self, file_path: str, model_type: str) -> str:
+    @staticmethod
+    def _load_summarizer():
         """
-        Transcribe speech from an audio file.
+        Load the pegasus summarization pipeline from the shared model registry.
         """
-        model = self._load_model(model_type)
-        result = model.transcribe(file_path, beam_size=5, temperature=0.2)
+        from transformers import pipeline
+
+        return registry.get(
+            "transformers",
+            "google/pegasus-xsum",
+            lambda: pipeline(
+                "summarization",
+                model="google/pegasus-xsum",
+                tokenizer="google/pegasus-xsum",
+                use_fast=False,
+            ),
+        )
 
-        text_placeholder = st.empty()
-        show_text = "" 
+    def transcribe_stream(
+        self,
+        file_path: str,
+        model_type: str,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> Iterator[Segment]:
+        """
+        Transcribe speech and yield every segment as soon as faster-whisper decodes it.
 
-        text = []
-        for segment in result["segments"]: 
-            line = f"[{segment['start']:.2f}s -> {segment['end']:.2f}s] {segment['text']}"
-            text.append(segment["text"])
-            show_text += line + "\n"  # Append new line
-            text_placeholder.text_area("Transcription:", show_text, height=300)
+        Files transcribed before with the same model and options are served from the cache.
+        `progress` is called with the fraction of the audio transcribed so far.
+        """
+        key = cache_key(
+            audio=file_hash(file_path),
+            model=model_type,
+            compute_type="int8",
+            **DECODE_OPTIONS,
+        )
+        cached = transcription_cache.get(key)
+        if cached is not None:
+            for start, end, text in cached:
+                yield Segment(start=start, end=end, text=text)
+            return
 
-        return " ".join(text)
+        model = self._load_model(model_type)
+        segments, info = model.transcribe(file_path, **DECODE_OPTIONS)
 
-    def run_transcribe_model(self, file_path: str, model_type: str, state: dict) -> str:
-        """
-        Run the transcribe model function.
-        """
-        transcription = self._transcribe_model(file_path, model_type)
-        state["transcription"] = transcription  # Store in state
-        st.text_area("Transcription:", transcription, height=300)
+        decoded = []
+        for segment in segments:
+            decoded.append((segment.start, segment.end, segment.text))
+            if progress is not None and info.duration:
+                progress(min(segment.end / info.duration, 1.0))
+            yield Segment(start=segment.start, end=segment.end, text=segment.text)
+
+        # Only complete transcriptions are stored, a consumer that stops early caches nothing
+        transcription_cache.put(key, decoded)
 
     @staticmethod
     def _summarize_text(text: str) -> str:
         """
-        summarize text from speech recognition's transcribe
+        summarize text from speech recognition's transcribe, memoized by transcript and settings
         """
-        summarizer = pipeline(
-            "summarization",
-            model="google/pegasus-xsum",
-            tokenizer="google/pegasus-xsum",
-            use_fast=False,
-        )
         max_length = (
             len(text) // 5
         )  # Use integer division to ensure max_length is an integer
@@ -120,24 +221,25 @@ class Generation:
             max_length // 4
         )  # Use integer division to ensure min_length is an integer
 
+        key = cache_key(
+            text=text_hash(text),
+            model="google/pegasus-xsum",
+            max_length=max_length,
+            min_length=min_length,
+            do_sample=False,
+        )
+        summary_text = summary_cache.get(key)
+        if summary_text is not None:
+            return summary_text
+
+        summarizer = Generation._load_summarizer()
         summary = summarizer(
             text, max_length=max_length, min_length=min_length, do_sample=False
         )
 
-        return summary[0]["summary_text"]
-
-    def run_summarize_text(self, state: dict) -> str:
-        """
-        Run the summarize text function.
-        """
-        if "transcription" not in state:
-            st.error("No transcription found. Please transcribe first.")
-            return
-
-        summary = self._summarize_text(
-            state["transcription"]
-        )  # Use state transcription
-        st.text_area("Summary:", summary, height=300)
+        summary_text = summary[0]["summary_text"]
+        summary_cache.put(key, summary_text)
+        return summary_text
 
 
 class Utils:
@@ -152,18 +254,48 @@ class Utils:
                 temp_file_path = temp_file.name
             return temp_file_path
 
-    @staticmethod
-    def process_step(state, step, title, process_function):
-        """
-        Handles the transcription and summarization steps dynamically.
-        """
-        if state.get("result") == step:
-            with st.expander(title, expanded=True):
-                st.subheader(f"{title} Result")
-                with st.spinner("Processing... ⏳"):
-                    generation = Generation()
-                    process_function(generation)
-                    state["result"] = step + 1  # Move to the next step
+
+def start_prewarm() -> None:
+    """
+    Load the default Whisper model and the summarizer in the background while the page renders.
+    """
+    generation = Generation()
+    loaders = {
+        f"whisper-{model_type}": (lambda model_type=model_type: generation._load_model(model_type))
+        for model_type in prewarm.configured_models([MODEL_TYPES[0]])
+    }
+    loaders["summarizer"] = Generation._load_summarizer
+    prewarm.prewarm(loaders)
+
+
+def run_job(context, file_path: str, model_type: str) -> dict:
+    """
+    Transcribe and summarize an uploaded file in a job worker, publishing segments as they are decoded.
+    """
+    generation = Generation()
+    try:
+        context.progress(0.0, "Transcribing audio...")
+        text = []
+        for segment in generation.transcribe_stream(
+            file_path,
+            model_type,
+            progress=lambda fraction: context.progress(0.9 * fraction, "Transcribing audio..."),
+        ):
+            context.segment(segment.start, segment.end, segment.text)
+            text.append(segment.text)
+        transcription = " ".join(text)
+
+        context.progress(0.9, "Summarizing...")
+        summary = generation._summarize_text(transcription)
+    finally:
+        # The upload was copied for this job only
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    return {"transcription": transcription, "summary": summary}
+
+
+job_queue.register("transcription", run_job)
 
 
 def main():
@@ -172,32 +304,35 @@ def main():
     interface.get_header(
         "🗣️ Speech Recognition", "Upload an audio file and transcribe it using Whisper."
     )
+    start_prewarm()
 
     with st.expander("Input file", expanded=True):
         uploaded_file = interface.input_file()
 
     with st.expander("Generation", expanded=True):
         model_type = interface.input_model()
+        if not prewarm.is_ready():
+            st.caption(
+                "⏳ Models are still loading in the background, the first run may take longer."
+            )
+        metrics = job_queue.metrics()
+        st.caption(f"🧾 {metrics['queued']} jobs waiting, {metrics['running']} running")
         if (
             st.button("Generate Result !!", icon="🚀", type="primary")
             and uploaded_file is not None
         ):
             temp_file_path = utils.temporary_file(uploaded_file)
-            state["temp_file_path"] = temp_file_path
-            state["model_type"] = model_type
-            state["result"] = 1
-
-    utils.process_step(
-        state,
-        1,
-        "Transcription",
-        lambda gen: gen.run_transcribe_model(
-            state["temp_file_path"], state["model_type"], state
-        ),
-    )
-    utils.process_step(
-        state, 2, "Summarization", lambda gen: gen.run_summarize_text(state)
-    )
+            try:
+                # The job id lives in this browser session, other sessions have their own
+                st.session_state["job_id"] = job_queue.submit(
+                    "transcription", file_path=temp_file_path, model_type=model_type
+                )
+            except QueueFull as e:
+                os.remove(temp_file_path)
+                st.error(f"The server is busy: {e}", icon="🚨")
+
+    if "job_id" in st.session_state:
+        interface.show_job(st.session_state["job_id"])
 
 
 if __name__ == "__main__":